@@ -1,7 +1,25 @@
 """DALI Voice Assistant - Backend Module"""
-from .speech_handler import speak_async, cleanup_audio
-from .language_handler import load_models, detect_language, switch_language
-from .database_handler import ConversationDB
-from .rasa_handler import get_rasa_reply
+import importlib
 
+# Submodules pull in pyttsx3, vosk and requests, so they are imported on first use
+_EXPORTS = {
+    "speak_async": ".speech_handler",
+    "cleanup_audio": ".speech_handler",
+    "load_models": ".language_handler",
+    "detect_language": ".language_handler",
+    "switch_language": ".language_handler",
+    "ModelWarmup": ".language_handler",
+    "ConversationDB": ".database_handler",
+    "get_rasa_reply": ".rasa_handler",
+}
+
+__all__ = list(_EXPORTS)
 __version__ = "1.0.0"
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+"""Admission control for the DALI WebSocket server
+
+Per-session token buckets limit how fast one client can send turns, and a
+global limit caps how many turns are in flight against Rasa at once. Turns
+that cannot get a slot wait in a bounded queue; they are shed with a `busy`
+reply when the queue is full or the queue deadline passes.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class Busy(Exception):
+    """Raised when a turn is rejected; `reason` and `retry_after` go to the client"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allows `rate` turns per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        """Take one token, or return the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=4, max_queue=16, queue_timeout=5.0, rate=1.0, burst=5):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        # Created on first use inside the running loop: on Python < 3.10 a semaphore
+        # binds to get_event_loop() at construction, and this runs at import time
+        self._slots = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_rate_limited": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "max_queue_depth": 0,
+            "queue_wait_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_concurrent=config.get("max_concurrent_turns", 4),
+            max_queue=config.get("max_queued_turns", 16),
+            queue_timeout=config.get("queue_timeout", 5.0),
+            rate=config.get("rate_per_second", 1.0),
+            burst=config.get("burst", 5),
+        )
+
+    def new_bucket(self):
+        return TokenBucket(self.rate, self.burst)
+
+    def check_rate(self, bucket):
+        retry_after = bucket.try_acquire()
+        if retry_after:
+            self.metrics["rejected_rate_limited"] += 1
+            raise Busy("rate_limited", round(retry_after, 2))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the global turn slots, waiting in the bounded queue if needed"""
+        occupied = self.in_flight + self.waiting
+        if occupied >= self.max_concurrent + self.max_queue:
+            self.metrics["rejected_queue_full"] += 1
+            raise Busy("queue_full", self.queue_timeout)
+        if occupied >= self.max_concurrent:
+            self.metrics["queued"] += 1
+
+        self.waiting += 1
+        queue_depth = max(0, occupied + 1 - self.max_concurrent)
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], queue_depth)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.metrics["rejected_queue_timeout"] += 1
+            raise Busy("queue_timeout", self.queue_timeout)
+        finally:
+            self.waiting -= 1
+            self.metrics["queue_wait_seconds"] += time.monotonic() - start
+
+        self.metrics["admitted"] += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def snapshot(self):
+        return dict(self.metrics, in_flight=self.in_flight, waiting=self.waiting)
@@ -0,0 +1,138 @@
+"""Clients for the local ASR service (backend/asr_service.py)
+
+AsrStream is the asyncio client used by websocket_server.py. RemoteRecognizer
+wraps it behind the KaldiRecognizer methods main.py already calls
+(AcceptWaveform / Result / PartialResult / FinalResult), so the voice loop
+works unchanged whether models are loaded locally or by the service.
+"""
+
+import asyncio
+import json
+import threading
+
+import websockets
+
+DEFAULT_URL = "ws://127.0.0.1:2700"
+
+
+class AsrError(RuntimeError):
+    pass
+
+
+class AsrStream:
+    """One recognition stream on the ASR service; not safe for concurrent feeds"""
+
+    def __init__(self, websocket, session_id, language):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.language = language
+        self.languages = []
+
+    @classmethod
+    async def connect(cls, url=DEFAULT_URL, language="english", sample_rate=16000, session_id=None):
+        if url.startswith("unix:"):
+            websocket = await websockets.unix_connect(url[len("unix:"):], "ws://localhost/")
+        else:
+            websocket = await websockets.connect(url, compression=None, max_size=2 ** 20)
+        stream = cls(websocket, session_id, language)
+        await websocket.send(json.dumps({"config": {
+            "language": language, "sample_rate": sample_rate, "session_id": session_id,
+        }}))
+        await stream._ready()
+        return stream
+
+    async def _receive(self):
+        reply = json.loads(await self.websocket.recv())
+        if reply.get("error"):
+            raise AsrError(reply["error"])
+        return reply
+
+    async def _ready(self):
+        reply = await self._receive()
+        self.languages = reply.get("languages", [])
+        self.language = reply.get("language", self.language)
+
+    async def feed(self, pcm):
+        """Send one PCM chunk; returns {"final": bool, "text"|"partial": str, ...}"""
+        await self.websocket.send(pcm)
+        return await self._receive()
+
+    async def set_language(self, language):
+        if language != self.language:
+            await self.websocket.send(json.dumps({"language": language}))
+            await self._ready()
+
+    async def reset(self):
+        await self.websocket.send(json.dumps({"reset": True}))
+
+    async def finish(self):
+        """Flush the last utterance and close the stream"""
+        await self.websocket.send(json.dumps({"eof": True}))
+        try:
+            return await self._receive()
+        finally:
+            await self.close()
+
+    async def close(self):
+        await self.websocket.close()
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _client_loop():
+    """Event loop thread shared by all RemoteRecognizers of this process"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asr-client", daemon=True).start()
+    return _loop
+
+
+class RemoteRecognizer:
+    """Drop-in for vosk.KaldiRecognizer that decodes on the ASR service"""
+
+    def __init__(self, url, language, sample_rate, session_id=None, timeout=10):
+        self.timeout = timeout
+        self._stream = self._call(AsrStream.connect(url, language, sample_rate, session_id))
+        self._result = {"text": ""}
+        self._partial = {"partial": ""}
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, _client_loop()).result(self.timeout)
+
+    @property
+    def languages(self):
+        return self._stream.languages
+
+    def AcceptWaveform(self, data):
+        reply = self._call(self._stream.feed(bytes(data)))
+        if reply.get("final"):
+            self._result = {"text": reply.get("text", "")}
+            self._partial = {"partial": ""}
+            return True
+        self._partial = {"partial": reply.get("partial", "")}
+        return False
+
+    def Result(self):
+        return json.dumps(self._result)
+
+    def PartialResult(self):
+        return json.dumps(self._partial)
+
+    def FinalResult(self):
+        reply = self._call(self._stream.finish())
+        return json.dumps({"text": reply.get("text", "")})
+
+    def close(self):
+        try:
+            self._call(self._stream.close())
+        except Exception:
+            pass
+
+    def __del__(self):
+        # main.py replaces recognizers without closing them
+        if getattr(self, "_stream", None) is not None:
+            asyncio.run_coroutine_threadsafe(self._stream.close(), _client_loop())
@@ -0,0 +1,166 @@
+"""Local ASR service: one process holds the Vosk models for every DALI front end
+
+main.py and websocket_server.py stream PCM here instead of loading their own
+copies of the models. Each WebSocket connection is one recognition stream:
+
+  client -> {"config": {"language", "sample_rate", "session_id"}}   first frame
+  server -> {"ready": true, "languages": [...]}                      once the model is loaded
+  client -> <binary PCM, 16-bit mono>                                 any number of frames
+  server -> {"partial": "..."} or {"final": true, "text": "..."}       one reply per frame
+  client -> {"language": "hindi"}   switch model, {"reset": true}   new utterance
+  client -> {"eof": true}           server replies with the final result and closes
+
+Every reply carries the stream's session_id so results can be tied to the
+conversation database. Decoding runs on a worker pool sized to the cores;
+frames of one stream are decoded in order, different streams in parallel.
+
+Run with `python asr_service.py` from the backend directory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import websockets
+
+from language_handler import ModelWarmup
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+config_path = os.path.join(os.path.dirname(__file__), "config.json")
+
+with open(config_path, "r") as f:
+    config = json.load(f)
+
+service_config = config.get("asr_service", {})
+
+DECODE_WORKERS = service_config.get("workers") or os.cpu_count() or 2
+decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="asr-decode")
+model_warmup = None
+
+stats = {"streams": 0, "active": 0, "audio_seconds": 0.0, "decode_seconds": 0.0}
+
+
+def _new_recognizer(language, sample_rate):
+    from vosk import KaldiRecognizer
+    return KaldiRecognizer(model_warmup.models[language], sample_rate)
+
+
+def _decode(recognizer, pcm):
+    """Runs on a decode worker; returns the reply for one PCM frame"""
+    if recognizer.AcceptWaveform(pcm):
+        return {"final": True, "text": json.loads(recognizer.Result()).get("text", "")}
+    return {"final": False, "partial": json.loads(recognizer.PartialResult()).get("partial", "")}
+
+
+async def _wait_for_model(language):
+    """True once `language` is loaded; False if warm-up finished without it"""
+    loop = asyncio.get_running_loop()
+    while language not in model_warmup.models:
+        if model_warmup.done.is_set():
+            return False
+        await loop.run_in_executor(None, model_warmup.done.wait, 0.5)
+    return True
+
+
+async def handle_stream(websocket, path):
+    loop = asyncio.get_running_loop()
+    try:
+        first = json.loads(await websocket.recv()).get("config", {})
+    except (ValueError, AttributeError, websockets.exceptions.ConnectionClosed):
+        return
+
+    session_id = first.get("session_id")
+    language = first.get("language", "english")
+    sample_rate = first.get("sample_rate", config.get("sample_rate", 16000))
+
+    async def reply(event):
+        await websocket.send(json.dumps(dict(event, session_id=session_id, language=language)))
+
+    if not await _wait_for_model(language):
+        await reply({"error": f"No {language} model loaded"})
+        return
+    recognizer = _new_recognizer(language, sample_rate)
+    await reply({"ready": True, "languages": sorted(model_warmup.models)})
+
+    stats["streams"] += 1
+    stats["active"] += 1
+    audio_seconds = decode_seconds = 0.0
+    logger.info(f"Stream opened for {session_id} ({language})")
+
+    try:
+        async for message in websocket:
+            if isinstance(message, bytes):
+                start = time.perf_counter()
+                result = await loop.run_in_executor(decode_pool, _decode, recognizer, message)
+                decode_seconds += time.perf_counter() - start
+                audio_seconds += len(message) / 2 / sample_rate
+                await reply(result)
+                continue
+
+            try:
+                control = json.loads(message)
+                if not isinstance(control, dict):
+                    raise ValueError("control frame must be a JSON object")
+            except ValueError as e:
+                await reply({"error": f"Bad control frame: {e}"})
+                continue
+            if control.get("eof"):
+                final = await loop.run_in_executor(decode_pool, recognizer.FinalResult)
+                await reply({"final": True, "eof": True, "text": json.loads(final).get("text", "")})
+                break
+            if control.get("language") and control["language"] != language:
+                if not await _wait_for_model(control["language"]):
+                    await reply({"error": f"No {control['language']} model loaded"})
+                    continue
+                language = control["language"]
+                recognizer = _new_recognizer(language, sample_rate)
+                await reply({"ready": True, "languages": sorted(model_warmup.models)})
+            elif control.get("reset"):
+                recognizer = _new_recognizer(language, sample_rate)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        stats["active"] -= 1
+        stats["audio_seconds"] += audio_seconds
+        stats["decode_seconds"] += decode_seconds
+        rtf = decode_seconds / audio_seconds if audio_seconds else 0.0
+        logger.info(f"Stream closed for {session_id}: {audio_seconds:.1f}s audio, RTF {rtf:.2f} "
+                    f"({stats['active']} active, {stats['streams']} total)")
+
+
+async def main():
+    global model_warmup
+
+    # Streams opened before a model is ready simply wait for it
+    model_warmup = ModelWarmup(config.get("model_paths", {})).start()
+
+    unix_path = service_config.get("unix_socket")
+    if unix_path and hasattr(socket, "AF_UNIX"):
+        server = websockets.unix_serve(handle_stream, unix_path, max_size=2 ** 20)
+        where = f"unix:{unix_path}"
+    else:
+        host = service_config.get("host", "127.0.0.1")
+        port = service_config.get("port", 2700)
+        server = websockets.serve(handle_stream, host, port, max_size=2 ** 20, compression=None)
+        where = f"ws://{host}:{port}"
+
+    async with server:
+        logger.info(f"🚀 DALI ASR service running on {where} "
+                    f"({DECODE_WORKERS} decode workers)")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("ASR service stopped by user")
+    finally:
+        # No cancel_futures (Python 3.9+); queued decodes are abandoned with the process
+        decode_pool.shutdown(wait=False)
@@ -0,0 +1,265 @@
+"""Microphone capture with overrun accounting and adaptive buffering
+
+PyAudio reads use exception_on_overflow=False, so frames lost to an input
+overflow used to vanish silently. AdaptiveCapture compares the frames it has
+read with the wall-clock time since the stream started: any shortfall beyond
+what is still queued in PortAudio is counted as dropped. It also tracks the
+queue depth before each read and the decoder's real-time factor (decode time /
+audio time, reported by the caller).
+
+Every `window` reads the policy looks at those numbers:
+  - overruns: double frames_per_buffer (stream is reopened) up to the maximum
+  - decoder lagging (RTF or queue depth high): read larger chunks and let
+    should_decode() skip silent chunks, keeping a short hangover after speech
+    so the recognizer still sees the end of an utterance
+  - healthy for `recover_windows` windows: step back towards the base sizes
+"""
+
+import logging
+import math
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureStats:
+    def __init__(self):
+        self.reads = 0
+        self.frames_read = 0
+        self.overruns = 0
+        self.dropped_frames = 0
+        self.max_queue_depth = 0
+        self.skipped_chunks = 0
+        self.decoded_chunks = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.adaptations = 0
+
+    @property
+    def rtf(self):
+        return self.decode_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    def snapshot(self):
+        return {
+            "reads": self.reads,
+            "frames_read": self.frames_read,
+            "overruns": self.overruns,
+            "dropped_frames": self.dropped_frames,
+            "max_queue_depth": self.max_queue_depth,
+            "skipped_chunks": self.skipped_chunks,
+            "decoded_chunks": self.decoded_chunks,
+            "audio_seconds": round(self.audio_seconds, 2),
+            "decode_seconds": round(self.decode_seconds, 2),
+            "rtf": round(self.rtf, 3),
+            "adaptations": self.adaptations,
+        }
+
+    def summary(self):
+        return (f"{self.overruns} overruns, {self.dropped_frames} dropped frames, "
+                f"max queue {self.max_queue_depth} frames, RTF {self.rtf:.2f}, "
+                f"{self.skipped_chunks} silent chunks skipped, {self.adaptations} adaptations")
+
+
+class AdaptiveCapture:
+    def __init__(self, pa, sample_rate=16000, chunk_frames=4000, frames_per_buffer=8000,
+                 max_frames_per_buffer=32000, max_chunk_frames=16000, frame_multiple=1,
+                 rtf_high=0.8, vad_threshold=300, vad_hangover_chunks=3, window=8,
+                 recover_windows=4, report_seconds=60, input_device_index=None, name="mic"):
+        self.pa = pa
+        self.sample_rate = sample_rate
+        self.base_chunk_frames = chunk_frames
+        self.base_frames_per_buffer = frames_per_buffer
+        self.chunk_frames = chunk_frames
+        self.frames_per_buffer = frames_per_buffer
+        self.max_frames_per_buffer = max(max_frames_per_buffer, frames_per_buffer)
+        self.max_chunk_frames = max(max_chunk_frames, chunk_frames)
+        # Porcupine needs whole frames, so chunk sizes stay a multiple of this
+        self.frame_multiple = frame_multiple
+        self.rtf_high = rtf_high
+        self.vad_threshold = vad_threshold
+        self.vad_hangover_chunks = vad_hangover_chunks
+        self.window = window
+        self.recover_windows = recover_windows
+        self.report_seconds = report_seconds
+        self.input_device_index = input_device_index
+        self.name = name
+
+        self.stats = CaptureStats()
+        self.stream = None
+        self.skip_silence = False
+        self._hangover = 0
+        self._open_frames_per_buffer = None
+        self._stream_started = 0.0
+        self._stream_frames = 0
+        self._window_reads = 0
+        self._window_overruns = 0
+        self._window_max_depth = 0
+        self._window_audio = 0.0
+        self._window_decode = 0.0
+        self._healthy_windows = 0
+        self._last_report = time.monotonic()
+
+    @classmethod
+    def from_config(cls, pa, config, **overrides):
+        capture = config.get("audio_capture", {})
+        options = {
+            "sample_rate": config.get("sample_rate", 16000),
+            "chunk_frames": capture.get("chunk_frames", 4000),
+            "frames_per_buffer": capture.get("frames_per_buffer", config.get("frames_per_buffer", 8000)),
+            "max_frames_per_buffer": capture.get("max_frames_per_buffer", 32000),
+            "max_chunk_frames": capture.get("max_chunk_frames", 16000),
+            "rtf_high": capture.get("rtf_high", 0.8),
+            "vad_threshold": capture.get("vad_threshold", 300),
+            "vad_hangover_chunks": capture.get("vad_hangover_chunks", 3),
+            "report_seconds": capture.get("report_seconds", 60),
+        }
+        options.update(overrides)
+        return cls(pa, **options)
+
+    def open(self):
+        import pyaudio
+
+        self.stream = self.pa.open(
+            rate=self.sample_rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            input=True,
+            input_device_index=self.input_device_index,
+            frames_per_buffer=self.frames_per_buffer,
+        )
+        self.stream.start_stream()
+        self._open_frames_per_buffer = self.frames_per_buffer
+        self._stream_started = time.perf_counter()
+        self._stream_frames = 0
+        return self
+
+    def close(self):
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception as e:
+                logger.debug(f"{self.name}: close error: {e}")
+            self.stream = None
+
+    def _reopen(self):
+        self.close()
+        self.open()
+
+    def read(self):
+        """Read one chunk, accounting for queue depth and frames lost to overruns"""
+        depth = self._available()
+        data = self.stream.read(self.chunk_frames, exception_on_overflow=False)
+
+        self.stats.reads += 1
+        self.stats.frames_read += self.chunk_frames
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+        self._window_max_depth = max(self._window_max_depth, depth)
+        self._stream_frames += self.chunk_frames
+
+        # Wall-clock says more audio was captured than we have read or can still read
+        expected = (time.perf_counter() - self._stream_started) * self.sample_rate
+        missing = int(expected - self._stream_frames - self._available())
+        # Small gaps are clock drift and scheduling jitter, not lost audio
+        if missing > max(self.frames_per_buffer, self.sample_rate // 4):
+            self.stats.overruns += 1
+            self.stats.dropped_frames += missing
+            self._window_overruns += 1
+            self._stream_frames += missing
+            logger.warning(f"{self.name}: input overrun, ~{missing} frames "
+                           f"({missing / self.sample_rate:.2f}s) dropped")
+
+        self._window_reads += 1
+        if self._window_reads >= self.window:
+            self._adapt()
+        return data
+
+    def _available(self):
+        try:
+            return self.stream.get_read_available()
+        except Exception:
+            return 0
+
+    def resync(self):
+        """Call after deliberately not reading (e.g. while a reply plays) so the
+        gap is not counted as an overrun"""
+        self._stream_started = time.perf_counter() - (self._stream_frames + self._available()) / self.sample_rate
+
+    def record_decode(self, chunk, seconds):
+        """Report how long the decoder took for `chunk` (bytes of 16-bit PCM)"""
+        audio = len(chunk) / 2 / self.sample_rate
+        self.stats.decoded_chunks += 1
+        self.stats.audio_seconds += audio
+        self.stats.decode_seconds += seconds
+        self._window_audio += audio
+        self._window_decode += seconds
+
+    def should_decode(self, chunk):
+        """False for silent chunks while the decoder is lagging"""
+        if not self.skip_silence:
+            return True
+        if self._rms(chunk) >= self.vad_threshold:
+            self._hangover = self.vad_hangover_chunks
+            return True
+        if self._hangover > 0:
+            self._hangover -= 1
+            return True
+        self.stats.skipped_chunks += 1
+        return False
+
+    @staticmethod
+    def _rms(chunk):
+        samples = array("h", chunk)
+        if not samples:
+            return 0.0
+        return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+    def _round(self, frames):
+        return max(self.frame_multiple, frames - frames % self.frame_multiple)
+
+    def _adapt(self):
+        window_rtf = self._window_decode / self._window_audio if self._window_audio else 0.0
+        lagging = window_rtf > self.rtf_high or self._window_max_depth > 2 * self.chunk_frames
+        changes = []
+
+        if self._window_overruns and self.frames_per_buffer < self.max_frames_per_buffer:
+            self.frames_per_buffer = min(self.max_frames_per_buffer, self.frames_per_buffer * 2)
+            changes.append(f"frames_per_buffer → {self.frames_per_buffer}")
+
+        if lagging or self._window_overruns:
+            self._healthy_windows = 0
+            if self.chunk_frames < self.max_chunk_frames:
+                self.chunk_frames = self._round(min(self.max_chunk_frames, self.chunk_frames * 2))
+                changes.append(f"chunk → {self.chunk_frames}")
+            if not self.skip_silence:
+                self.skip_silence = True
+                changes.append("skipping silence")
+        else:
+            self._healthy_windows += 1
+            if self._healthy_windows >= self.recover_windows:
+                self._healthy_windows = 0
+                if self.chunk_frames > self.base_chunk_frames:
+                    self.chunk_frames = self._round(max(self.base_chunk_frames, self.chunk_frames // 2))
+                    changes.append(f"chunk → {self.chunk_frames}")
+                elif self.skip_silence:
+                    self.skip_silence = False
+                    changes.append("decoding all audio")
+                elif self.frames_per_buffer > self.base_frames_per_buffer:
+                    self.frames_per_buffer = max(self.base_frames_per_buffer, self.frames_per_buffer // 2)
+                    changes.append(f"frames_per_buffer → {self.frames_per_buffer}")
+
+        if changes:
+            self.stats.adaptations += 1
+            logger.info(f"{self.name}: {', '.join(changes)} "
+                        f"(RTF {window_rtf:.2f}, queue {self._window_max_depth}, "
+                        f"{self._window_overruns} overruns)")
+            if self.stream and self._open_frames_per_buffer != self.frames_per_buffer:
+                self._reopen()
+
+        self._window_reads = self._window_overruns = self._window_max_depth = 0
+        self._window_audio = self._window_decode = 0.0
+
+        if time.monotonic() - self._last_report >= self.report_seconds:
+            self._last_report = time.monotonic()
+            logger.info(f"{self.name}: {self.stats.summary()}")
@@ -0,0 +1,337 @@
+"""Batch transcription and intent labelling of recorded commands
+
+Transcribes a directory (or manifest) of WAV files with the configured Vosk
+models on a pool of worker processes, runs detect_language and intent
+parsing on every utterance, and writes JSONL plus an SRT in the same layout
+as backend/transcript.srt. Optionally stores the results in conversations.db.
+
+Usage (from the project root):
+    python -m backend.batch_transcribe recordings/ --out results/batch
+    python -m backend.batch_transcribe manifest.jsonl --nlu local --model backend/rasa/models/x.tar.gz --db
+
+A manifest is either one WAV path per line or JSONL with an "audio" (or
+"path") key and an optional "language" hint; paths are relative to it.
+
+Memory: every worker process loads its own copy of each Vosk model it needs
+(on first use, so an English-only batch never loads the Hindi model). A large
+Vosk model takes 1-2 GB resident, so peak RAM is roughly workers x the models
+in use; the default is capped at DEFAULT_WORKERS, raise --workers only when
+that fits.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+from .language_handler import load_models, detect_language
+from .database_handler import ConversationDB
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.json")
+CHUNK_FRAMES = 4000
+DEFAULT_WORKERS = min(os.cpu_count() or 2, 4)
+
+
+# --- Inputs ---
+
+def collect_inputs(source):
+    """[(wav_path, language_hint)] from a directory tree or a manifest file"""
+    if os.path.isdir(source):
+        return [(os.path.join(root, name), None)
+                for root, _, files in sorted(os.walk(source))
+                for name in sorted(files) if name.lower().endswith(".wav")]
+
+    base = os.path.dirname(os.path.abspath(source))
+    inputs = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                path, hint = entry.get("audio") or entry.get("path"), entry.get("language")
+            else:
+                path, hint = line, None
+            inputs.append((path if os.path.isabs(path) else os.path.join(base, path), hint))
+    return inputs
+
+
+# --- Worker processes: each Vosk model is loaded once per process, on first use ---
+
+_model_paths = {}
+_models = {}
+
+
+def _init_worker(model_paths):
+    global _model_paths
+    logging.getLogger().setLevel(logging.WARNING)
+    _model_paths = {lang: path for lang, path in model_paths.items() if path and os.path.exists(path)}
+
+
+def _model(language):
+    """The worker's model for `language`, loading it the first time; None if it fails"""
+    if language not in _models:
+        _models[language] = load_models({language: _model_paths[language]}).get(language)
+    return _models[language]
+
+
+def _decode(path, language):
+    """Utterances of one file as dicts with start/end seconds, text and mean word confidence"""
+    from vosk import KaldiRecognizer
+
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError("expected 16-bit mono PCM")
+        recognizer = KaldiRecognizer(_model(language), wav.getframerate())
+        recognizer.SetWords(True)
+        duration = wav.getnframes() / wav.getframerate()
+
+        results = []
+        while True:
+            data = wav.readframes(CHUNK_FRAMES)
+            if not data:
+                break
+            if recognizer.AcceptWaveform(data):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+
+    utterances = []
+    for result in results:
+        words = result.get("result") or []
+        text = result.get("text", "").strip()
+        if not text or not words:
+            continue
+        utterances.append({
+            "start": round(words[0]["start"], 3),
+            "end": round(words[-1]["end"], 3),
+            "text": text,
+            "asr_confidence": round(sum(w.get("conf", 1.0) for w in words) / len(words), 3),
+        })
+    return utterances, duration
+
+
+def transcribe_file(path, hint=None):
+    """Runs in a worker: transcribe, detect the language, re-decode if it differs"""
+    start = time.perf_counter()
+    language = hint if hint in _model_paths else (
+        "english" if "english" in _model_paths else next(iter(_model_paths), None))
+    record = {"file": path, "language": language, "utterances": [], "audio_seconds": 0.0}
+    if language is None or _model(language) is None:
+        record["error"] = f"no Vosk model for {language}" if language else "no Vosk models configured"
+        return record
+    try:
+        utterances, duration = _decode(path, language)
+        detected = detect_language(" ".join(u["text"] for u in utterances), language)
+        if detected != language and detected in _model_paths and _model(detected) is not None:
+            # Same switch the live loop makes: decode again with the detected language's model
+            language = detected
+            utterances, duration = _decode(path, language)
+        record.update(language=language, utterances=utterances, audio_seconds=duration)
+    except Exception as e:
+        record["error"] = str(e)
+    record["decode_seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+# --- Intent labelling (main process) ---
+
+class HttpParser:
+    """Rasa /model/parse over HTTP"""
+
+    def __init__(self, parse_url, workers=8, timeout=10):
+        self.parse_url = parse_url
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+
+    def _parse(self, text):
+        response = requests.post(self.parse_url, json={"text": text}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def parse_many(self, texts):
+        return list(self.pool.map(self._parse, texts))
+
+
+class LocalParser:
+    """NLU of a trained Rasa model loaded in-process, no server needed"""
+
+    def __init__(self, model_path):
+        import asyncio
+        from rasa.core.agent import Agent
+
+        self._asyncio = asyncio
+        self.agent = Agent.load(model_path)
+
+    def parse_many(self, texts):
+        async def _run():
+            return [await self.agent.parse_message(text) for text in texts]
+        return self._asyncio.run(_run())
+
+
+def label_intents(records, parser):
+    utterances = [u for r in records for u in r["utterances"]]
+    if not parser or not utterances:
+        return
+    try:
+        parses = parser.parse_many([u["text"] for u in utterances])
+    except Exception as e:
+        logger.error(f"Intent parsing failed: {e}")
+        return
+    for utterance, parse in zip(utterances, parses):
+        intent = parse.get("intent") or {}
+        utterance["intent"] = intent.get("name")
+        utterance["intent_confidence"] = round(intent.get("confidence") or 0.0, 4)
+        utterance["entities"] = [{"entity": e.get("entity"), "value": e.get("value")}
+                                 for e in parse.get("entities", [])]
+
+
+def add_replies(records, rasa_url):
+    """Full Rasa replies; each file is its own sender so conversations don't mix"""
+    from .rasa_handler import stream_rasa_sentences
+
+    for record in records:
+        sender = f"batch_{uuid.uuid4().hex[:8]}"
+        for utterance in record["utterances"]:
+            utterance["reply"] = " ".join(s for _, s in stream_rasa_sentences(utterance["text"], rasa_url, sender=sender))
+
+
+# --- Outputs ---
+
+def _srt_time(seconds):
+    ms = int(round(seconds * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _bot_line(utterance):
+    if "reply" in utterance:
+        return utterance["reply"]
+    if utterance.get("intent"):
+        return f"[intent: {utterance['intent']} ({utterance['intent_confidence']:.2f})]"
+    return ""
+
+
+def write_outputs(records, out_prefix):
+    """<out_prefix>.jsonl (one line per utterance or failed file) and <out_prefix>.srt"""
+    os.makedirs(os.path.dirname(os.path.abspath(out_prefix)), exist_ok=True)
+    index = 0
+    with open(out_prefix + ".jsonl", "w", encoding="utf-8") as jsonl, \
+            open(out_prefix + ".srt", "w", encoding="utf-8") as srt:
+        for record in records:
+            if record.get("error"):
+                jsonl.write(json.dumps({"file": record["file"], "error": record["error"]}) + "\n")
+                continue
+            recorded = datetime.fromtimestamp(os.path.getmtime(record["file"])).strftime("%Y-%m-%d %H:%M:%S")
+            for utterance in record["utterances"]:
+                index += 1
+                jsonl.write(json.dumps(dict(utterance, file=record["file"], language=record["language"]),
+                                       ensure_ascii=False) + "\n")
+                srt.write(f"{index}\n"
+                          f"{_srt_time(utterance['start'])} --> {_srt_time(utterance['end'])}\n"
+                          f"[{recorded}]\n"
+                          f"YOU ({record['language'].upper()}): {utterance['text']}\n"
+                          f"BOT: {_bot_line(utterance)}\n\n")
+    return index
+
+
+def store_results(records, db_path):
+    """Insert every utterance as a conversation of one batch session"""
+    db = ConversationDB(db_path)
+    session_id = f"batch_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    db.start_session(session_id)
+    rows = [(u["text"], _bot_line(u), r["language"], u.get("intent_confidence", u["asr_confidence"]))
+            for r in records if not r.get("error") for u in r["utterances"]]
+    db.add_conversations(session_id, rows)
+    db.end_session(session_id)
+    return session_id, len(rows)
+
+
+# --- CLI ---
+
+def run(source, out_prefix, workers=None, nlu="rasa", model=None, replies=False, db_path=None):
+    with open(CONFIG_PATH, "r") as f:
+        config = json.load(f)
+
+    inputs = collect_inputs(source)
+    if not inputs:
+        logger.error(f"No WAV files found in {source}")
+        return 1
+    workers = workers or DEFAULT_WORKERS
+    logger.info(f"Transcribing {len(inputs)} files on {workers} processes")
+
+    start = time.perf_counter()
+    records = [None] * len(inputs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config["model_paths"],)) as pool:
+        futures = {pool.submit(transcribe_file, path, hint): i for i, (path, hint) in enumerate(inputs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            records[futures[future]] = record = future.result()
+            if record.get("error"):
+                logger.warning(f"{record['file']}: {record['error']}")
+            if done % 50 == 0 or done == len(inputs):
+                logger.info(f"{done}/{len(inputs)} files transcribed")
+    asr_seconds = time.perf_counter() - start
+
+    if nlu == "rasa":
+        spec = config.get("speculative_nlu", {})
+        parse_url = spec.get("parse_url") or config["rasa_url"].split("/webhooks/")[0] + "/model/parse"
+        label_intents(records, HttpParser(parse_url))
+    elif nlu == "local":
+        label_intents(records, LocalParser(model))
+    if replies:
+        add_replies(records, config["rasa_url"])
+
+    count = write_outputs(records, out_prefix)
+    if db_path is not None:
+        db_path = db_path or config.get("database", {}).get("path", "conversations.db")
+        session_id, stored = store_results(records, db_path)
+        logger.info(f"Stored {stored} utterances in {db_path} as {session_id}")
+    wall = time.perf_counter() - start
+
+    audio = sum(r["audio_seconds"] for r in records)
+    failed = sum(1 for r in records if r.get("error"))
+    print("\n📊 BATCH SUMMARY")
+    print("=" * 60)
+    print(f"Files: {len(records)} ({failed} failed), utterances: {count}")
+    print(f"Audio: {audio / 3600:.2f} h in {wall / 60:.1f} min wall clock "
+          f"(ASR {asr_seconds / 60:.1f} min)")
+    print(f"Throughput: {audio / wall if wall else 0:.1f} audio-hours per wall-clock hour "
+          f"({audio / asr_seconds if asr_seconds else 0:.1f} for ASR alone)")
+    print(f"Output: {out_prefix}.jsonl, {out_prefix}.srt")
+    print("=" * 60)
+    return 0 if not failed else 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch transcription and intent labelling of WAV files")
+    parser.add_argument("source", help="Directory of WAV files or a manifest (paths or JSONL)")
+    parser.add_argument("--out", default="batch_transcript", help="Output prefix for .jsonl and .srt")
+    parser.add_argument("--workers", type=int, help="Worker processes, each holding its own Vosk models (default: CPU count, at most 4)")
+    parser.add_argument("--nlu", choices=["rasa", "local", "none"], default="rasa",
+                        help="rasa: /model/parse on the running server, local: load --model in-process")
+    parser.add_argument("--model", help="Trained Rasa model (.tar.gz) for --nlu local")
+    parser.add_argument("--replies", action="store_true",
+                        help="Also fetch full replies from the webhook (runs custom actions)")
+    parser.add_argument("--db", nargs="?", const="", default=None,
+                        help="Store results in the configured database (or the given path)")
+    args = parser.parse_args(argv)
+
+    if args.nlu == "local" and not args.model:
+        parser.error("--nlu local requires --model")
+    return run(args.source, args.out, args.workers, args.nlu, args.model, args.replies, args.db)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
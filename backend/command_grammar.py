@@ -0,0 +1,192 @@
+"""Grammar-constrained command recognition
+
+Most spoken commands come from the closed set in backend/rasa/data/nlu.yml,
+so a recognizer limited to those phrases decodes them faster and with fewer
+confusions than the full open-vocabulary model. The grammar is built from
+the NLU examples, expanded with every known value of each entity in
+domain.yml (apps, songs), plus the wake and exit words.
+
+ConstrainedRecognizer runs the constrained pass first and keeps the audio of
+the current utterance. When that pass is unsure (low mean word confidence, or
+an out-of-grammar "[unk]" word), the same audio is decoded again with the
+open-vocabulary recognizer, so accuracy never drops below the full model.
+
+Runtime grammars need a model with a dynamic graph (the small Vosk models);
+large models ignore them, so config "model_paths" must name a small model per
+language used only for the constrained pass. Languages without one are skipped.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NLU_PATH = os.path.join(BASE_DIR, "rasa", "data", "nlu.yml")
+DOMAIN_PATH = os.path.join(BASE_DIR, "rasa", "domain.yml")
+
+EXTRA_PHRASES = ["hey dali", "hello dali", "exit", "quit", "stop", "bye"]
+
+_ENTITY = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+
+
+def normalize_phrase(text):
+    return " ".join(re.sub(r"[^\w' ]+", " ", text.lower()).split())
+
+
+def build_command_phrases(nlu_path=NLU_PATH, domain_path=DOMAIN_PATH):
+    """Sorted phrase list for a Vosk grammar; ends with "[unk]" for out-of-grammar speech"""
+    with open(nlu_path, "r", encoding="utf-8") as f:
+        nlu = yaml.safe_load(f) or {}
+    with open(domain_path, "r", encoding="utf-8") as f:
+        domain = yaml.safe_load(f) or {}
+
+    examples = []
+    for item in nlu.get("nlu", []):
+        for line in (item.get("examples") or "").splitlines():
+            line = line.strip().lstrip("- ").strip()
+            if line:
+                examples.append(line)
+
+    # Every annotated value of each domain entity, so "open chrome" also yields "open word"
+    entity_names = set(domain.get("entities") or [])
+    values = {name: set() for name in entity_names}
+    for example in examples:
+        for value, name in _ENTITY.findall(example):
+            values.setdefault(name, set()).add(value)
+
+    phrases = set(EXTRA_PHRASES)
+    for example in examples:
+        annotated = _ENTITY.findall(example)
+        if not annotated:
+            phrases.add(normalize_phrase(example))
+            continue
+        template = _ENTITY.sub(lambda m: "{" + m.group(2) + "}", example)
+        variants = [template]
+        for _, name in annotated:
+            options = values.get(name) or {""}
+            variants = [v.replace("{" + name + "}", option, 1) for v in variants for option in options]
+        phrases.update(normalize_phrase(v) for v in variants)
+
+    phrases.discard("")
+    return sorted(phrases) + ["[unk]"]
+
+
+class ConstrainedRecognizer:
+    """KaldiRecognizer-compatible: constrained pass first, open-vocabulary fallback"""
+
+    def __init__(self, grammar_model, open_factory, sample_rate, phrases, min_confidence=0.8, stats=None):
+        from vosk import KaldiRecognizer
+
+        self.grammar_model = grammar_model
+        self.open_factory = open_factory
+        self.sample_rate = sample_rate
+        self.grammar = json.dumps(phrases)
+        self.min_confidence = min_confidence
+        self.stats = stats if stats is not None else new_stats()
+        self._recognizer = KaldiRecognizer(grammar_model, sample_rate, self.grammar)
+        self._recognizer.SetWords(True)
+        self._audio = bytearray()
+        self._result = {"text": ""}
+
+    def _confident(self, result):
+        words = result.get("result") or []
+        if not words or any(w.get("word") == "[unk]" for w in words):
+            return False
+        return sum(w.get("conf", 0.0) for w in words) / len(words) >= self.min_confidence
+
+    def _finish(self, result):
+        """Accept the constrained result or re-decode the utterance with the full model"""
+        audio, self._audio = bytes(self._audio), bytearray()
+        if not result.get("text"):
+            self._result = {"text": ""}
+            return
+        if self._confident(result):
+            self.stats["constrained"] += 1
+            self._result = {"text": result["text"]}
+            return
+
+        start = time.perf_counter()
+        recognizer = self.open_factory()
+        texts = []
+        if recognizer.AcceptWaveform(audio):
+            texts.append(json.loads(recognizer.Result()).get("text", ""))
+        texts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+        self._result = {"text": " ".join(t for t in texts if t)}
+        self.stats["fallbacks"] += 1
+        self.stats["fallback_seconds"] += time.perf_counter() - start
+        logger.debug(f"Grammar pass unsure about '{result['text']}', open model heard '{self._result['text']}'")
+
+    def AcceptWaveform(self, data):
+        self._audio.extend(data)
+        start = time.perf_counter()
+        final = self._recognizer.AcceptWaveform(data)
+        self.stats["constrained_seconds"] += time.perf_counter() - start
+        if final:
+            self._finish(json.loads(self._recognizer.Result()))
+        return final
+
+    def Result(self):
+        return json.dumps(self._result)
+
+    def PartialResult(self):
+        return self._recognizer.PartialResult()
+
+    def FinalResult(self):
+        self._finish(json.loads(self._recognizer.FinalResult()))
+        return self.Result()
+
+
+def new_stats():
+    return {"constrained": 0, "fallbacks": 0, "constrained_seconds": 0.0, "fallback_seconds": 0.0}
+
+
+class ConstrainedDecoding:
+    """Builds ConstrainedRecognizers from config["constrained_recognition"]"""
+
+    def __init__(self, grammar_models, phrases, min_confidence=0.8):
+        self.grammar_models = grammar_models    # language -> vosk.Model used for the grammar pass
+        self.phrases = phrases
+        self.min_confidence = min_confidence
+        self.stats = new_stats()
+
+    @classmethod
+    def from_config(cls, config):
+        """None unless enabled"""
+        from .language_handler import load_models
+
+        spec = config.get("constrained_recognition", {})
+        if not spec.get("enabled"):
+            return None
+        grammar_models = {}
+        for lang in spec.get("languages", ["english"]):
+            path = (spec.get("model_paths") or {}).get(lang)
+            if not path:
+                # The open model is usually a large static graph that ignores the grammar:
+                # the "constrained" pass would be a full decode, then a second one on fallback
+                logger.warning(f"Constrained recognition: no small grammar model for {lang} "
+                               f"in constrained_recognition.model_paths, skipping it")
+                continue
+            grammar_models.update(load_models({lang: path}))
+        phrases = build_command_phrases()
+        logger.info(f"Constrained recognition for {', '.join(grammar_models) or 'no languages'} "
+                    f"({len(phrases)} phrases)")
+        return cls(grammar_models, phrases, spec.get("min_confidence", 0.8))
+
+    def covers(self, lang):
+        return lang in self.grammar_models
+
+    def recognizer(self, lang, open_factory, sample_rate):
+        return ConstrainedRecognizer(self.grammar_models[lang], open_factory, sample_rate,
+                                     self.phrases, self.min_confidence, self.stats)
+
+    def summary(self):
+        total = self.stats["constrained"] + self.stats["fallbacks"]
+        rate = self.stats["fallbacks"] / total if total else 0.0
+        return (f"{self.stats['constrained']}/{total} utterances from the grammar pass, "
+                f"{rate:.0%} fell back ({self.stats['fallback_seconds']:.2f}s spent on fallbacks)")
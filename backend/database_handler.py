@@ -63,6 +63,10 @@ class ConversationDB:
                     total_interactions INTEGER DEFAULT 0
                 )
             """)
+            # Browser that opened the session (web client's persistent key); older databases lack it
+            columns = {row["name"] for row in cursor.execute("PRAGMA table_info(sessions)")}
+            if "client_key" not in columns:
+                cursor.execute("ALTER TABLE sessions ADD COLUMN client_key TEXT")
             
             # Language switches table
             cursor.execute("""
@@ -76,9 +80,30 @@ class ConversationDB:
                 )
             """)
             
+            # Capture health per session and audio source (overruns, decode lag)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS audio_stats (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    source TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    overruns INTEGER DEFAULT 0,
+                    dropped_frames INTEGER DEFAULT 0,
+                    max_queue_depth INTEGER DEFAULT 0,
+                    skipped_chunks INTEGER DEFAULT 0,
+                    audio_seconds REAL DEFAULT 0.0,
+                    decode_seconds REAL DEFAULT 0.0,
+                    adaptations INTEGER DEFAULT 0,
+                    FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+                )
+            """)
+            
             # Create indexes for better query performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_session ON conversations(session_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON conversations(timestamp)")
+            # Keyset pagination of a session's history walks (session_id, id)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_id ON conversations(session_id, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_client ON sessions(client_key)")
     
     def add_conversation(self, session_id, user_input, bot_response, language="english", confidence_score=0.0):
         """Add a conversation entry"""
@@ -89,6 +114,7 @@ class ConversationDB:
                 (session_id, user_input, bot_response, language, confidence_score)
                 VALUES (?, ?, ?, ?, ?)
             """, (session_id, user_input, bot_response, language, confidence_score))
+            conversation_id = cursor.lastrowid
             
             # Update session interaction count
             cursor.execute("""
@@ -96,15 +122,32 @@ class ConversationDB:
                 SET total_interactions = total_interactions + 1
                 WHERE session_id = ?
             """, (session_id,))
+        return conversation_id
+    
+    def add_conversations(self, session_id, rows):
+        """Bulk-add (user_input, bot_response, language, confidence_score) rows in one transaction"""
+        rows = list(rows)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO conversations 
+                (session_id, user_input, bot_response, language, confidence_score)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(session_id, *row) for row in rows])
+            cursor.execute("""
+                UPDATE sessions 
+                SET total_interactions = total_interactions + ?
+                WHERE session_id = ?
+            """, (len(rows), session_id))
     
-    def start_session(self, session_id):
+    def start_session(self, session_id, client_key=None):
         """Start a new session"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO sessions (session_id, start_time)
-                VALUES (?, ?)
-            """, (session_id, datetime.now()))
+                INSERT INTO sessions (session_id, start_time, client_key)
+                VALUES (?, ?, ?)
+            """, (session_id, datetime.now(), client_key))
     
     def end_session(self, session_id):
         """End a session"""
@@ -126,6 +169,52 @@ class ConversationDB:
                 VALUES (?, ?, ?)
             """, (session_id, from_lang, to_lang))
     
+    def log_audio_stats(self, session_id, source, stats):
+        """Store the capture counters of one audio source (AdaptiveCapture.stats.snapshot())"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO audio_stats
+                (session_id, source, overruns, dropped_frames, max_queue_depth,
+                 skipped_chunks, audio_seconds, decode_seconds, adaptations)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (session_id, source, stats.get("overruns", 0), stats.get("dropped_frames", 0),
+                  stats.get("max_queue_depth", 0), stats.get("skipped_chunks", 0),
+                  stats.get("audio_seconds", 0.0), stats.get("decode_seconds", 0.0),
+                  stats.get("adaptations", 0)))
+    
+    def get_statistics(self):
+        """Overall conversation, language and audio capture statistics"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sessions")
+            total_sessions = cursor.fetchone()[0]
+            cursor.execute("SELECT language, COUNT(*) FROM conversations GROUP BY language")
+            by_language = {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) FROM language_switches")
+            language_switches = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT COALESCE(SUM(overruns), 0), COALESCE(SUM(dropped_frames), 0),
+                       COALESCE(MAX(max_queue_depth), 0), COALESCE(SUM(skipped_chunks), 0),
+                       COALESCE(SUM(audio_seconds), 0), COALESCE(SUM(decode_seconds), 0)
+                FROM audio_stats
+            """)
+            overruns, dropped, max_depth, skipped, audio_seconds, decode_seconds = cursor.fetchone()
+        return {
+            "total_sessions": total_sessions,
+            "total_conversations": sum(by_language.values()),
+            "conversations_by_language": by_language,
+            "language_switches": language_switches,
+            "audio": {
+                "overruns": overruns,
+                "dropped_frames": dropped,
+                "max_queue_depth": max_depth,
+                "skipped_chunks": skipped,
+                "audio_seconds": audio_seconds,
+                "rtf": decode_seconds / audio_seconds if audio_seconds else 0.0,
+            },
+        }
+    
     def get_session_history(self, session_id):
         """Get conversation history for a session"""
         with self.get_connection() as conn:
@@ -133,10 +222,59 @@ class ConversationDB:
             cursor.execute("""
                 SELECT * FROM conversations 
                 WHERE session_id = ?
-                ORDER BY timestamp
+                ORDER BY id
             """, (session_id,))
             return cursor.fetchall()
     
+    def get_session_history_page(self, session_id, before_id=None, limit=50):
+        """Get one page of history older than `before_id` (newest page if None)
+        
+        Returns (rows in chronological order, has_more).
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if before_id is None:
+                cursor.execute("""
+                    SELECT * FROM conversations
+                    WHERE session_id = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (session_id, limit + 1))
+            else:
+                cursor.execute("""
+                    SELECT * FROM conversations
+                    WHERE session_id = ? AND id < ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (session_id, before_id, limit + 1))
+            rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        return list(reversed(rows[:limit])), has_more
+    
+    def get_client_history_page(self, client_key, before_id=None, limit=50):
+        """Like get_session_history_page, across every session opened with `client_key`"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if before_id is None:
+                cursor.execute("""
+                    SELECT c.* FROM conversations c
+                    JOIN sessions s ON s.session_id = c.session_id
+                    WHERE s.client_key = ?
+                    ORDER BY c.id DESC
+                    LIMIT ?
+                """, (client_key, limit + 1))
+            else:
+                cursor.execute("""
+                    SELECT c.* FROM conversations c
+                    JOIN sessions s ON s.session_id = c.session_id
+                    WHERE s.client_key = ? AND c.id < ?
+                    ORDER BY c.id DESC
+                    LIMIT ?
+                """, (client_key, before_id, limit + 1))
+            rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        return list(reversed(rows[:limit])), has_more
+    
     def cleanup_old_sessions(self, days=30):
         """Delete sessions older than specified days"""
         cutoff_date = datetime.now() - timedelta(days=days)
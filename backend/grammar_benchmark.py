@@ -0,0 +1,146 @@
+"""Compare open-vocabulary and grammar-constrained command recognition
+
+For a manifest of recorded commands with reference transcripts, decodes each
+file three ways and reports word error rate, sentence accuracy, decode time
+and real-time factor:
+  - open:        the configured full model, as main.py used to
+  - grammar:     constrained pass only (what the grammar alone gets right)
+  - constrained: constrained pass with open-vocabulary fallback (what main.py runs)
+
+Usage (from the project root):
+    python -m backend.grammar_benchmark commands.jsonl [--grammar-model PATH] [--print-grammar]
+
+Manifest lines: {"audio": "path/to/file.wav", "text": "open chrome"}; paths
+are relative to the manifest. WAV files must be 16-bit mono PCM.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+
+from .command_grammar import ConstrainedRecognizer, build_command_phrases, new_stats, normalize_phrase
+from .language_handler import load_models
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUNK_FRAMES = 4000
+
+
+def load_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                audio = entry.get("audio") or entry.get("path")
+                items.append((audio if os.path.isabs(audio) else os.path.join(base, audio),
+                              normalize_phrase(entry.get("text", ""))))
+    return items
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance"""
+    ref, hyp = reference.split(), hypothesis.split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1]
+
+
+def decode(recognizer, path):
+    """(text, seconds spent decoding, audio seconds)"""
+    with wave.open(path, "rb") as wav:
+        duration = wav.getnframes() / wav.getframerate()
+        texts = []
+        start = time.perf_counter()
+        while True:
+            data = wav.readframes(CHUNK_FRAMES)
+            if not data:
+                break
+            if recognizer.AcceptWaveform(data):
+                texts.append(json.loads(recognizer.Result()).get("text", ""))
+        texts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+        elapsed = time.perf_counter() - start
+    return " ".join(t for t in texts if t), elapsed, duration
+
+
+def run(manifest, grammar_model_path=None, min_confidence=0.8, language="english"):
+    from vosk import KaldiRecognizer
+
+    with open(os.path.join(BASE_DIR, "config.json"), "r") as f:
+        config = json.load(f)
+    open_model = load_models({language: config["model_paths"][language]})[language]
+    grammar_model = (load_models({language: grammar_model_path})[language]
+                     if grammar_model_path else open_model)
+    phrases = build_command_phrases()
+    grammar = json.dumps(phrases)
+    items = load_manifest(manifest)
+
+    def make(mode, rate):
+        if mode == "open":
+            return KaldiRecognizer(open_model, rate)
+        if mode == "grammar":
+            return KaldiRecognizer(grammar_model, rate, grammar)
+        return ConstrainedRecognizer(grammar_model, lambda: KaldiRecognizer(open_model, rate),
+                                     rate, phrases, min_confidence, fallback_stats)
+
+    fallback_stats = new_stats()
+    results = {}
+    for mode in ("open", "grammar", "constrained"):
+        errors = words = exact = 0
+        decode_seconds = audio_seconds = 0.0
+        for path, reference in items:
+            with wave.open(path, "rb") as wav:
+                rate = wav.getframerate()
+            text, elapsed, duration = decode(make(mode, rate), path)
+            hypothesis = normalize_phrase(text)
+            errors += word_errors(reference, hypothesis)
+            words += len(reference.split())
+            exact += hypothesis == reference
+            decode_seconds += elapsed
+            audio_seconds += duration
+        results[mode] = {
+            "wer": errors / words if words else 0.0,
+            "sentence_accuracy": exact / len(items) if items else 0.0,
+            "decode_seconds": decode_seconds,
+            "rtf": decode_seconds / audio_seconds if audio_seconds else 0.0,
+            "ms_per_command": decode_seconds / len(items) * 1000 if items else 0.0,
+        }
+
+    total = fallback_stats["constrained"] + fallback_stats["fallbacks"]
+    print(f"\n📊 COMMAND RECOGNITION ({len(items)} files, {len(phrases)} grammar phrases)")
+    print("=" * 72)
+    print(f"{'mode':<14}{'WER':>8}{'sent acc':>10}{'decode s':>10}{'RTF':>8}{'ms/cmd':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<14}{r['wer']:>8.3f}{r['sentence_accuracy']:>10.3f}"
+              f"{r['decode_seconds']:>10.2f}{r['rtf']:>8.3f}{r['ms_per_command']:>10.1f}")
+    print(f"Fallbacks: {fallback_stats['fallbacks']}/{total} utterances "
+          f"(min confidence {min_confidence})")
+    print("=" * 72)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open vs grammar-constrained Vosk decoding")
+    parser.add_argument("manifest", nargs="?", help="JSONL with audio paths and reference text")
+    parser.add_argument("--grammar-model", help="Small Vosk model for the grammar pass (default: full model)")
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument("--print-grammar", action="store_true", help="Print the generated phrase list")
+    args = parser.parse_args(argv)
+
+    if args.print_grammar:
+        print("\n".join(build_command_phrases()))
+        return 0
+    if not args.manifest:
+        parser.error("manifest is required")
+    run(args.manifest, args.grammar_model, args.min_confidence)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import os
-from vosk import Model, KaldiRecognizer
+import threading
 import logging
 
 try:
@@ -13,6 +13,8 @@ logger = logging.getLogger(__name__)
 
 def load_models(model_paths):
     """Load all Vosk models"""
+    from vosk import Model
+
     models = {}
     for lang, path in model_paths.items():
         if not path or not os.path.exists(path):
@@ -25,6 +27,38 @@ def load_models(model_paths):
             logger.error(f"Failed to load {lang} model: {e}")
     return models
 
+class ModelWarmup:
+    """Load Vosk models on a background thread so callers can start serving first.
+
+    The `first` language is loaded before the others; `first_ready` is set as soon
+    as it is available and `done` once every model has been attempted.
+    """
+
+    def __init__(self, model_paths, first="english"):
+        self.model_paths = dict(model_paths or {})
+        self.first = first
+        self.models = {}
+        self.first_ready = threading.Event()
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vosk-warmup", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        order = sorted(self.model_paths, key=lambda lang: lang != self.first)
+        try:
+            for lang in order:
+                self.models.update(load_models({lang: self.model_paths[lang]}))
+                if lang == self.first:
+                    self.first_ready.set()
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {e}")
+        finally:
+            self.first_ready.set()
+            self.done.set()
+
 def detect_language(text, current_lang="english"):
     """
     Detect language from text
@@ -73,31 +107,39 @@ def detect_language(text, current_lang="english"):
     logger.info(f"✅ Keeping {current_lang}: {text[:50]}")
     return current_lang
 
-def switch_language(new_lang, models, current_lang, recognizer, sample_rate, stream, speak_func):
+def switch_language(new_lang, models, current_lang, recognizer, sample_rate, stream, speak_func,
+                    new_recognizer=None):
     """
     Switch the ASR recognizer to a new language model.
+    `new_recognizer(lang)` overrides how the recognizer is built (e.g. the ASR service).
     """
     if new_lang == current_lang:
         return current_lang, recognizer
 
-    try:
-        stream.stop_stream()
-        stream.close()
-    except Exception:
-        pass
-
-    new_stream = stream._parent.open(
-        rate=sample_rate,
-        channels=1,
-        format=stream._format,
-        input=True,
-        frames_per_buffer=8000
-    )
-    new_stream.start_stream()
-
-    from vosk import KaldiRecognizer
-    new_recognizer = KaldiRecognizer(models[new_lang], sample_rate)
+    # The reopened stream is not returned, so callers that keep reading their
+    # own stream (main.py's AdaptiveCapture) pass None
+    if stream is not None:
+        try:
+            stream.stop_stream()
+            stream.close()
+        except Exception:
+            pass
+
+        new_stream = stream._parent.open(
+            rate=sample_rate,
+            channels=1,
+            format=stream._format,
+            input=True,
+            frames_per_buffer=8000
+        )
+        new_stream.start_stream()
+
+    if new_recognizer:
+        recognizer = new_recognizer(new_lang)
+    else:
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(models[new_lang], sample_rate)
 
     speak_func(f"Language switched to {new_lang}", new_lang)
 
-    return new_lang, new_recognizer
+    return new_lang, recognizer
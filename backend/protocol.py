@@ -0,0 +1,154 @@
+"""Wire protocol for the DALI WebSocket server
+
+Two codecs are negotiated through the WebSocket subprotocol:
+  - "dali.json.v1" (or no subprotocol): one JSON object per text frame
+  - "dali.msgpack.v1": binary MessagePack frames with short field codes; a
+    frame carries a list of events so several server events can share one frame
+"""
+
+import asyncio
+import base64
+import json
+import logging
+from datetime import datetime
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    logging.warning("msgpack not installed. Only the JSON protocol is available.")
+
+logger = logging.getLogger(__name__)
+
+JSON_PROTOCOL = "dali.json.v1"
+MSGPACK_PROTOCOL = "dali.msgpack.v1"
+
+# Preferred first; the server picks the first one the client also offers
+SUBPROTOCOLS = [MSGPACK_PROTOCOL, JSON_PROTOCOL] if MSGPACK_AVAILABLE else [JSON_PROTOCOL]
+
+# Field name -> short code, mirrored in frontend/protocol.js
+FIELD_CODES = {
+    "type": "t",
+    "message": "m",
+    "session_id": "s",
+    "language": "l",
+    "speak": "k",
+    "timestamp": "ts",
+    "id": "i",
+    "event": "e",
+    "enabled": "en",
+    "voice_mode": "v",
+    "ready": "r",
+    "config": "c",
+    "components": "cp",
+    "messages": "ms",
+    "has_more": "hm",
+    "next_before_id": "nb",
+    "before_id": "b",
+    "limit": "n",
+    "data": "d",
+    "user": "u",
+    "bot": "bo",
+    "sample_rate": "sr",
+    "tts_rate": "tr",
+    "seq": "q",
+    "resume_token": "rt",
+    "resumed": "rs",
+    "reply_id": "ri",
+    "streamed": "st",
+    "reason": "rn",
+    "retry_after": "ra",
+    "final": "f",
+}
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+
+
+def _remap(obj, table):
+    if isinstance(obj, dict):
+        return {table.get(k, k): _remap(v, table) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_remap(v, table) for v in obj]
+    return obj
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode("ascii")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime):
+        return obj.timestamp()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode(events, protocol):
+    """Encode a list of events into one frame for the negotiated protocol"""
+    if protocol == MSGPACK_PROTOCOL:
+        return msgpack.packb(_remap(events, FIELD_CODES), default=_msgpack_default, use_bin_type=True)
+    if len(events) != 1:
+        raise ValueError("JSON frames carry exactly one event")
+    return json.dumps(events[0], default=_json_default)
+
+
+def decode(frame, protocol):
+    """Decode one incoming frame into a list of events"""
+    if protocol == MSGPACK_PROTOCOL and isinstance(frame, (bytes, bytearray)):
+        data = _remap(msgpack.unpackb(frame, raw=False), FIELD_NAMES)
+        return data if isinstance(data, list) else [data]
+
+    data = json.loads(frame)
+    # JSON clients send audio as base64 text; hand the server raw bytes either way
+    if data.get("type") == "audio" and isinstance(data.get("data"), str):
+        data["data"] = base64.b64decode(data["data"])
+    return [data]
+
+
+class Channel:
+    """Outbound side of one connection; batches events in the compact protocol"""
+
+    def __init__(self, websocket, protocol=None, batch_window=0.005, max_batch=16):
+        self.websocket = websocket
+        self.protocol = protocol or JSON_PROTOCOL
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_task = None
+
+    @property
+    def batching(self):
+        return self.protocol == MSGPACK_PROTOCOL
+
+    async def send(self, event):
+        if not self.batching:
+            await self.websocket.send(encode([event], self.protocol))
+            return
+        self._pending.append(event)
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        try:
+            await self.websocket.send(encode(events, self.protocol))
+        except Exception as e:
+            logger.debug(f"Dropped {len(events)} events: {e}")
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,88 @@
+"""Bytes and CPU time per message for the JSON and compact DALI protocols
+
+permessage-deflate is modelled with one raw-deflate stream per connection
+(context takeover), flushed after every frame like the WebSocket extension.
+
+Usage (from the project root):
+    python backend/protocol_benchmark.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from protocol import JSON_PROTOCOL, MSGPACK_PROTOCOL, MSGPACK_AVAILABLE, encode, decode
+
+
+def sample_events(seq=0):
+    """A representative mix of server -> client traffic; audio differs per call"""
+    now = datetime.now()
+    return [
+        {"type": "response", "id": 1042 + seq, "message": "The time is 09:41 PM", "language": "english",
+         "speak": True, "timestamp": now},
+        {"type": "response", "id": 1043, "message": "Opening Chrome", "language": "english",
+         "speak": True, "timestamp": now},
+        {"event": "voice_mode", "enabled": True},
+        {"type": "ready", "ready": True, "components": {"server": 0.12, "models": 8.4, "wake_word": 1.3}},
+        {"type": "history", "session_id": "web_session_20251107_183512_1a2b3c4d", "messages": [
+            {"id": 1000 + i, "user": "what time is it", "bot": "The time is 09:41 PM",
+             "language": "english", "timestamp": "2025-11-07 18:35:12"} for i in range(20)
+        ], "has_more": True, "next_before_id": 1000},
+        {"type": "audio", "data": os.urandom(3200)},
+    ]
+
+
+def measure(protocol, rounds, batch=1, deflate=False):
+    frames = [events[i:i + batch] for events in rounds for i in range(0, len(events), batch)]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if deflate else None
+
+    total_bytes = 0
+    start = time.process_time()
+    for frame_events in frames:
+        frame = encode(frame_events, protocol)
+        payload = frame.encode("utf-8") if isinstance(frame, str) else frame
+        if compressor:
+            payload = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        total_bytes += len(payload)
+        decode(frame, protocol)
+    cpu = time.process_time() - start
+
+    messages = sum(len(events) for events in rounds)
+    return total_bytes / messages, cpu / messages * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DALI protocol benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rounds = [sample_events(i) for i in range(args.iterations)]
+    variants = [
+        ("json", JSON_PROTOCOL, 1, False),
+        ("json + deflate", JSON_PROTOCOL, 1, True),
+    ]
+    if MSGPACK_AVAILABLE:
+        variants += [
+            ("msgpack", MSGPACK_PROTOCOL, 1, False),
+            ("msgpack + deflate", MSGPACK_PROTOCOL, 1, True),
+            ("msgpack batched x3", MSGPACK_PROTOCOL, 3, False),
+            ("msgpack batched x3 + deflate", MSGPACK_PROTOCOL, 3, True),
+        ]
+
+    print("\n📦 PROTOCOL BENCHMARK")
+    print("=" * 60)
+    print(f"{'variant':<32}{'bytes/msg':>12}{'CPU µs/msg':>14}")
+    for name, protocol, batch, deflate in variants:
+        size, cpu_us = measure(protocol, rounds, batch, deflate)
+        print(f"{name:<32}{size:>12.1f}{cpu_us:>14.1f}")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
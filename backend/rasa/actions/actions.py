@@ -4,6 +4,8 @@
 """Custom Rasa actions for DALI Voice Assistant"""
 
 import os
+import atexit
+import asyncio
 import datetime
 import subprocess
 import random
@@ -11,7 +13,8 @@ import threading
 import webbrowser
 import time
 import logging
-from typing import Any, Text, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Text, Dict, List, Optional
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
@@ -21,8 +24,29 @@ import psutil
 
 logger = logging.getLogger(__name__)
 
-# Thread-safe TTS with global engine
-tts_lock = threading.Lock()
+# Blocking side effects (processes, browser, keys, shutdown) run on a bounded
+# pool; TTS gets its own single worker so speech stays serialized.
+SIDE_EFFECT_WORKERS = int(os.environ.get("DALI_ACTION_WORKERS", "4"))
+SIDE_EFFECT_TIMEOUT = float(os.environ.get("DALI_ACTION_TIMEOUT", "10"))
+# Per-action overrides, e.g. DALI_ACTION_TIMEOUTS="action_open_app=20,action_shutdown_pc=5"
+ACTION_TIMEOUTS = {
+    name.strip(): float(seconds)
+    for name, _, seconds in (
+        item.partition("=") for item in os.environ.get("DALI_ACTION_TIMEOUTS", "").split(",") if "=" in item
+    )
+}
+# Side-effect metrics are logged at INFO this often (seconds) and at shutdown
+METRICS_LOG_INTERVAL = float(os.environ.get("DALI_ACTION_METRICS_INTERVAL", "300"))
+
+_executor = ThreadPoolExecutor(max_workers=SIDE_EFFECT_WORKERS, thread_name_prefix="dali-action")
+_tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dali-tts")
+_pending = set()
+
+# Per-action side-effect metrics: calls, failures, timeouts, total/max seconds
+ACTION_METRICS = {}
+_metrics_lock = threading.Lock()
+_metrics_logged_at = time.monotonic()
+
 _tts_engine = None
 
 def get_tts_engine():
@@ -32,21 +56,180 @@ def get_tts_engine():
         _tts_engine = pyttsx3.init(driverName='sapi5')
     return _tts_engine
 
+def _speak_blocking(text):
+    try:
+        engine = get_tts_engine()
+        engine.setProperty('rate', 170)
+        voices = engine.getProperty('voices')
+        engine.setProperty('voice', voices[0].id)
+        engine.say(text)
+        engine.runAndWait()
+    except Exception as e:
+        logger.error(f"TTS error: {e}")
+
 def speak(text):
-    """Speak text safely and asynchronously"""
-    def run():
-        with tts_lock:
+    """Queue text on the TTS worker without waiting for it"""
+    _tts_executor.submit(_speak_blocking, text)
+
+def _record(action, outcome, elapsed):
+    global _metrics_logged_at
+    with _metrics_lock:
+        m = ACTION_METRICS.setdefault(action, {
+            "calls": 0, "failures": 0, "timeouts": 0, "total_seconds": 0.0, "max_seconds": 0.0
+        })
+        m["calls"] += 1
+        if outcome == "failure":
+            m["failures"] += 1
+        elif outcome == "timeout":
+            m["timeouts"] += 1
+        m["total_seconds"] += elapsed
+        m["max_seconds"] = max(m["max_seconds"], elapsed)
+        due = time.monotonic() - _metrics_logged_at >= METRICS_LOG_INTERVAL
+        if due:
+            _metrics_logged_at = time.monotonic()
+    logger.debug(f"[{action}] side effect {outcome} in {elapsed * 1000:.0f} ms")
+    if due:
+        log_action_metrics()
+
+def get_action_metrics():
+    """Snapshot of the side-effect metrics per action"""
+    with _metrics_lock:
+        return {name: dict(m) for name, m in ACTION_METRICS.items()}
+
+def log_action_metrics():
+    """One INFO line per action: calls, failures, timeouts, mean/max seconds"""
+    for name, m in sorted(get_action_metrics().items()):
+        logger.info(f"[{name}] {m['calls']} side effects, {m['failures']} failed, "
+                    f"{m['timeouts']} timed out, mean {m['total_seconds'] / m['calls'] * 1000:.0f} ms, "
+                    f"max {m['max_seconds'] * 1000:.0f} ms")
+
+atexit.register(log_action_metrics)
+
+async def _run_side_effect(action, func, args, timeout):
+    """Returns the outcome: ok, timeout or failure"""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(loop.run_in_executor(_executor, func, *args), timeout)
+        outcome = "ok"
+    except asyncio.TimeoutError:
+        # The worker thread keeps running; only the wait is abandoned
+        outcome = "timeout"
+        logger.warning(f"[{action}] side effect exceeded {timeout}s")
+    except Exception as e:
+        outcome = "failure"
+        logger.error(f"[{action}] side effect failed: {e}")
+    _record(action, outcome, time.perf_counter() - start)
+    return outcome
+
+def offload(action: Text, func: Callable, *args, timeout: Optional[float] = None):
+    """Run a blocking side effect in the background and return immediately
+
+    The returned task can be awaited for the outcome when the reply depends on it.
+    """
+    if timeout is None:
+        timeout = ACTION_TIMEOUTS.get(action, SIDE_EFFECT_TIMEOUT)
+    task = asyncio.get_running_loop().create_task(_run_side_effect(action, func, args, timeout))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+async def run_blocking(func: Callable, *args):
+    """Await a short blocking call on the action pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+# App aliases shared by the open/close actions
+APP_PATHS = {
+    "notepad": "notepad.exe",
+    "calculator": "calc.exe",
+    "chrome": "chrome.exe",
+    "browser": "chrome.exe",
+    "excel": "excel.exe",
+    "word": "winword.exe"
+}
+
+def normalize_app_name(name):
+    """Lowercase and strip the .exe suffix so aliases and process names compare"""
+    name = (name or "").strip().lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+class ProcessIndex:
+    """Process-name -> PID index, refreshed incrementally with a short TTL"""
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._names = {}      # pid -> normalized name
+        self._by_name = {}    # normalized name -> set of pids
+        self._refreshed_at = 0.0
+
+    def refresh(self, force=False):
+        """Only query names for new PIDs and drop PIDs that have exited"""
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.ttl:
+                return
+            current = set(psutil.pids())
+            for pid in set(self._names) - current:
+                self._forget(pid)
+            for pid in current - set(self._names):
+                try:
+                    name = normalize_app_name(psutil.Process(pid).name())
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+                self._names[pid] = name
+                self._by_name.setdefault(name, set()).add(pid)
+            self._refreshed_at = time.monotonic()
+
+    def _forget(self, pid):
+        name = self._names.pop(pid, None)
+        pids = self._by_name.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[name]
+
+    def lookup(self, app):
+        """Return the PIDs whose process name matches an app alias or name"""
+        self.refresh()
+        key = normalize_app_name(app)
+        target = normalize_app_name(APP_PATHS.get(key, key))
+        with self._lock:
+            pids = self._by_name.get(target)
+            if pids:
+                return set(pids)
+            # Fall back to substring match over distinct names, not processes
+            matches = set()
+            for name, name_pids in self._by_name.items():
+                if key in name:
+                    matches |= name_pids
+            return matches
+
+    def terminate(self, pids, timeout=3.0):
+        """Terminate all PIDs at once, wait up to `timeout`, kill stragglers"""
+        procs = []
+        for pid in pids:
             try:
-                engine = get_tts_engine()
-                engine.setProperty('rate', 170)
-                voices = engine.getProperty('voices')
-                engine.setProperty('voice', voices[0].id)
-                engine.say(text)
-                engine.runAndWait()
-            except Exception as e:
-                logger.error(f"TTS error: {e}")
-    
-    threading.Thread(target=run, daemon=True).start()
+                proc = psutil.Process(pid)
+                # Guard against PID reuse since the last refresh
+                if normalize_app_name(proc.name()) != self._names.get(pid):
+                    continue
+                proc.terminate()
+                procs.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        gone, alive = psutil.wait_procs(procs, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+        with self._lock:
+            for proc in procs:
+                self._forget(proc.pid)
+        return len(procs)
+
+process_index = ProcessIndex()
 
 # --- Custom Actions ---
 
@@ -54,7 +237,7 @@ class ActionTellFact(Action):
     def name(self) -> Text:
         return "action_tell_fact"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         facts = [
             "Honey never spoils. Archaeologists have found 3000-year-old honey in Egyptian tombs that's still edible.",
             "A day on Venus is longer than its year.",
@@ -71,7 +254,7 @@ class ActionPlayMusic(Action):
     def name(self) -> Text:
         return "action_play_music"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         song = tracker.get_slot("song")
         
         if song:
@@ -83,10 +266,7 @@ class ActionPlayMusic(Action):
         speak(message)
         
         # Open default music player or YouTube
-        try:
-            webbrowser.open("https://www.youtube.com/")
-        except Exception as e:
-            logger.error(f"Error opening music: {e}")
+        offload(self.name(), webbrowser.open, "https://www.youtube.com/")
         
         return []
 
@@ -94,13 +274,9 @@ class ActionChangeMusic(Action):
     def name(self) -> Text:
         return "action_change_music"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        try:
-            pyautogui.press('nexttrack')
-            message = "Skipping to next track"
-        except Exception as e:
-            logger.error(f"Error changing music: {e}")
-            message = "Could not change the track"
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        offload(self.name(), pyautogui.press, 'nexttrack')
+        message = "Skipping to next track"
         
         dispatcher.utter_message(text=message)
         speak(message)
@@ -110,25 +286,13 @@ class ActionOpenApp(Action):
     def name(self) -> Text:
         return "action_open_app"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         app = tracker.get_slot("app")
         
-        app_paths = {
-            "notepad": "notepad.exe",
-            "calculator": "calc.exe",
-            "chrome": "chrome.exe",
-            "browser": "chrome.exe",
-            "excel": "excel.exe",
-            "word": "winword.exe"
-        }
-        
-        if app and app.lower() in app_paths:
-            try:
-                subprocess.Popen(app_paths[app.lower()])
-                message = f"Opening {app}"
-            except Exception as e:
-                logger.error(f"Error opening {app}: {e}")
-                message = f"Could not open {app}"
+        if app and app.lower() in APP_PATHS:
+            # Popen returns once the process is spawned, so wait for it to report a failed launch
+            outcome = await offload(self.name(), subprocess.Popen, APP_PATHS[app.lower()])
+            message = f"Opening {app}" if outcome == "ok" else f"Could not open {app}"
         else:
             message = "Please specify which app to open"
         
@@ -140,16 +304,15 @@ class ActionCloseApp(Action):
     def name(self) -> Text:
         return "action_close_app"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         app = tracker.get_slot("app")
         
         if app:
             try:
-                for proc in psutil.process_iter(['name']):
-                    if app.lower() in proc.info['name'].lower():
-                        proc.terminate()
-                        message = f"Closing {app}"
-                        break
+                pids = await run_blocking(process_index.lookup, app)
+                if pids:
+                    offload(self.name(), process_index.terminate, pids)
+                    message = f"Closing {app}"
                 else:
                     message = f"{app} is not running"
             except Exception as e:
@@ -166,7 +329,7 @@ class ActionTellTime(Action):
     def name(self) -> Text:
         return "action_tell_time"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         now = datetime.datetime.now()
         time_str = now.strftime("%I:%M %p")
         message = f"The time is {time_str}"
@@ -179,7 +342,7 @@ class ActionTellDate(Action):
     def name(self) -> Text:
         return "action_tell_date"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         today = datetime.date.today()
         date_str = today.strftime("%B %d, %Y")
         message = f"Today is {date_str}"
@@ -192,15 +355,12 @@ class ActionShutdownPC(Action):
     def name(self) -> Text:
         return "action_shutdown_pc"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         message = "Shutting down in 60 seconds. Say cancel shutdown to abort."
         dispatcher.utter_message(text=message)
         speak(message)
         
-        try:
-            os.system("shutdown /s /t 60")
-        except Exception as e:
-            logger.error(f"Shutdown error: {e}")
+        offload(self.name(), os.system, "shutdown /s /t 60")
         
         return []
 
@@ -208,14 +368,11 @@ class ActionRestartPC(Action):
     def name(self) -> Text:
         return "action_restart_pc"
     
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         message = "Restarting in 60 seconds"
         dispatcher.utter_message(text=message)
         speak(message)
         
-        try:
-            os.system("shutdown /r /t 60")
-        except Exception as e:
-            logger.error(f"Restart error: {e}")
+        offload(self.name(), os.system, "shutdown /r /t 60")
         
         return []
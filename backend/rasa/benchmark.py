@@ -0,0 +1,240 @@
+"""Benchmark Rasa pipeline profiles and prune the local training cache
+
+Usage (from backend/rasa):
+    python benchmark.py run [--profiles config.yml config_latency.yml]
+    python benchmark.py prune-cache [--days 7] [--all]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import yaml
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".rasa", "cache")
+DEFAULT_PROFILES = ["config.yml", "config_latency.yml"]
+
+
+# --- Cache pruning ---
+
+def prune_cache(days=7, prune_all=False):
+    """Remove stale tmp* artifacts from .rasa/cache
+
+    Entries not used for `days` days are dropped from cache.db together with
+    their directories, and any tmp* directory no longer referenced is removed.
+    """
+    db_path = os.path.join(CACHE_DIR, "cache.db")
+    if not os.path.isdir(CACHE_DIR):
+        logger.info("No Rasa cache found")
+        return 0
+
+    if prune_all:
+        freed = _dir_size(CACHE_DIR)
+        shutil.rmtree(CACHE_DIR)
+        logger.info(f"Removed whole cache ({freed / 1e6:.1f} MB)")
+        return freed
+
+    referenced = set()
+    if os.path.exists(db_path):
+        cutoff = datetime.now() - timedelta(days=days)
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("DELETE FROM cache_entry WHERE last_used < ?", (cutoff.isoformat(" "),))
+            for (location,) in conn.execute(
+                "SELECT result_location FROM cache_entry WHERE result_location IS NOT NULL"
+            ):
+                # Locations are stored with the separator of the OS that trained
+                referenced.add(os.path.basename(location.replace("\\", "/")))
+            conn.commit()
+        finally:
+            conn.close()
+
+    freed = 0
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith("tmp") and os.path.isdir(path) and name not in referenced:
+            freed += _dir_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Pruned {name}")
+
+    logger.info(f"Freed {freed / 1e6:.1f} MB, kept {len(referenced)} cached artifacts")
+    return freed
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total
+
+
+# --- Benchmark ---
+
+def _profile_name(config_file):
+    return os.path.splitext(os.path.basename(config_file))[0]
+
+
+def train_profile(config_file, out_dir):
+    """Train one profile and return (model_path, seconds)"""
+    name = _profile_name(config_file)
+    start = time.perf_counter()
+    subprocess.run(
+        ["rasa", "train", "--config", config_file, "--out", out_dir,
+         "--fixed-model-name", name, "--force"],
+        cwd=BASE_DIR, check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return os.path.join(out_dir, f"{name}.tar.gz"), elapsed
+
+
+def evaluate_profile(model_path, results_dir):
+    """Run rasa test on nlu.yml and test_stories.yml, return accuracies"""
+    subprocess.run(
+        ["rasa", "test", "nlu", "--model", model_path, "--nlu", "data/nlu.yml",
+         "--out", results_dir],
+        cwd=BASE_DIR, check=True,
+    )
+    subprocess.run(
+        ["rasa", "test", "core", "--model", model_path, "--stories", "test_stories.yml",
+         "--out", results_dir],
+        cwd=BASE_DIR, check=True,
+    )
+
+    intent_acc = _read_json(os.path.join(results_dir, "intent_report.json")).get("accuracy")
+    story_report = _read_json(os.path.join(results_dir, "story_report.json"))
+    story_acc = story_report.get("conversation_accuracy", {}).get("accuracy", story_report.get("accuracy"))
+    return intent_acc, story_acc
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        logger.warning(f"Missing report: {path}")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_nlu_messages(exclude_intents=()):
+    """Plain-text training examples from data/nlu.yml (entity markup stripped)"""
+    with open(os.path.join(BASE_DIR, "data", "nlu.yml"), "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    messages = []
+    for item in data.get("nlu", []):
+        if item.get("intent") in exclude_intents:
+            continue
+        for line in (item.get("examples") or "").splitlines():
+            line = line.strip().lstrip("- ").strip()
+            if line:
+                messages.append(re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", line))
+    return messages
+
+
+def measure_parse_latency(model_path, messages, warmup=5):
+    """Per-message parse latency in milliseconds using an in-process agent"""
+    from rasa.core.agent import Agent
+
+    async def _run():
+        agent = Agent.load(model_path)
+        for text in messages[:warmup]:
+            await agent.parse_message(text)
+        timings = []
+        for text in messages:
+            start = time.perf_counter()
+            await agent.parse_message(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    return asyncio.run(_run())
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list
+
+    The smallest value with at least `fraction` of the samples at or below it:
+    rank ceil(fraction * n), i.e. index ceil(fraction * n) - 1. For 20 samples
+    p95 is the 19th value, for 100 samples the 95th.
+    """
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def run_benchmark(profiles, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    messages = load_nlu_messages()
+    results = []
+
+    for config_file in profiles:
+        name = _profile_name(config_file)
+        logger.info(f"=== Profile: {name} ===")
+        model_path, train_seconds = train_profile(config_file, out_dir)
+        intent_acc, story_acc = evaluate_profile(model_path, os.path.join(out_dir, f"results_{name}"))
+        timings = sorted(measure_parse_latency(model_path, messages))
+
+        results.append({
+            "profile": name,
+            "train_seconds": round(train_seconds, 1),
+            "model_mb": round(os.path.getsize(model_path) / 1e6, 2),
+            "intent_accuracy": intent_acc,
+            "story_accuracy": story_acc,
+            "parse_ms_mean": round(statistics.mean(timings), 2),
+            "parse_ms_p50": round(statistics.median(timings), 2),
+            "parse_ms_p95": round(_percentile(timings, 0.95), 2),
+        })
+
+    with open(os.path.join(out_dir, "benchmark.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print("\n📊 PROFILE BENCHMARK")
+    print("=" * 100)
+    print(f"{'profile':<20}{'train s':>10}{'model MB':>10}{'intent acc':>12}{'story acc':>12}"
+          f"{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for r in results:
+        print(f"{r['profile']:<20}{r['train_seconds']:>10}{r['model_mb']:>10}"
+              f"{_fmt(r['intent_accuracy']):>12}{_fmt(r['story_accuracy']):>12}"
+              f"{r['parse_ms_mean']:>10}{r['parse_ms_p50']:>10}{r['parse_ms_p95']:>10}")
+    print("=" * 100)
+    return results
+
+
+def _fmt(value):
+    return f"{value:.3f}" if isinstance(value, (int, float)) else "n/a"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DALI Rasa profile tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Train, test and time each pipeline profile")
+    run.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES)
+    run.add_argument("--out", default="benchmark_models")
+
+    prune = sub.add_parser("prune-cache", help="Remove stale .rasa/cache artifacts")
+    prune.add_argument("--days", type=int, default=7)
+    prune.add_argument("--all", action="store_true", help="Delete the entire cache")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run_benchmark(args.profiles, os.path.join(BASE_DIR, args.out))
+    else:
+        prune_cache(days=args.days, prune_all=args.all)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Bounded-memory tracker store for DALI's Rasa server
+
+Trackers are persisted in a local SQLite file (like conversations.db) and only
+the most recently used ones are kept in memory:
+
+  - an LRU tier of at most `cache_size` serialised trackers
+  - senders idle for `idle_seconds` are evicted from memory (they reload from
+    SQLite on their next message); rows idle for `retention_days` are deleted
+  - each tracker keeps at most `max_events` events; when older events are
+    dropped, the current slot values are saved with the remaining events so
+    nothing the dialogue depends on is lost
+
+Enabled in endpoints.yml with `type: dali_tracker_store.DaliTrackerStore`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import rasa.shared.core.trackers
+from rasa.core.tracker_store import SerializedTrackerAsText, TrackerStore
+from rasa.shared.core.conversation import Dialogue
+from rasa.shared.core.events import SlotSet
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class DaliTrackerStore(TrackerStore, SerializedTrackerAsText):
+    def __init__(self, domain, host=None, event_broker=None, db="trackers.db", cache_size=256,
+                 idle_seconds=1800, max_events=200, retention_days=30, eviction_interval=60,
+                 **kwargs):
+        super().__init__(domain, event_broker, **kwargs)
+        self.db_path = db if os.path.isabs(db) else os.path.join(BASE_DIR, db)
+        self.cache_size = int(cache_size)
+        self.idle_seconds = float(idle_seconds)
+        self.max_events = int(max_events)
+        self.retention_seconds = float(retention_days) * 86400 if retention_days else None
+        self.eviction_interval = float(eviction_interval)
+        # Rebuilt trackers keep only this many events in their deque
+        self.max_event_history = self.max_events
+
+        self._cache = OrderedDict()     # sender_id -> (serialised tracker, last access)
+        self._last_sweep = time.monotonic()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS trackers (
+                    sender_id TEXT PRIMARY KEY,
+                    tracker TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trackers_updated ON trackers(updated)")
+            self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0, "compacted": 0, "deleted": 0}
+        logger.info(f"DALI tracker store at {self.db_path} (cache {self.cache_size}, "
+                    f"idle {self.idle_seconds:.0f}s, max {self.max_events} events)")
+
+    # --- SQLite, run off the event loop ---
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _db_write(self, sender_id, serialised):
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO trackers (sender_id, tracker, updated) VALUES (?, ?, ?)",
+                (sender_id, serialised, time.time()),
+            )
+            self._conn.commit()
+
+    def _db_read(self, sender_id):
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT tracker FROM trackers WHERE sender_id = ?", (sender_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _db_keys(self):
+        with self._db_lock:
+            return [row[0] for row in self._conn.execute("SELECT sender_id FROM trackers")]
+
+    def _db_delete_older_than(self, cutoff):
+        with self._db_lock:
+            deleted = self._conn.execute("DELETE FROM trackers WHERE updated < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    # --- Memory tier ---
+
+    def _remember(self, sender_id, serialised):
+        self._cache[sender_id] = (serialised, time.monotonic())
+        self._cache.move_to_end(sender_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    async def _sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.eviction_interval:
+            return
+        self._last_sweep = now
+
+        idle = [sender for sender, (_, seen) in self._cache.items() if now - seen > self.idle_seconds]
+        for sender in idle:
+            del self._cache[sender]
+        self.stats["evicted"] += len(idle)
+
+        if self.retention_seconds:
+            self.stats["deleted"] += await self._run(self._db_delete_older_than, time.time() - self.retention_seconds)
+        if idle:
+            logger.debug(f"Evicted {len(idle)} idle trackers, {len(self._cache)} in memory, stats {self.stats}")
+
+    def _compact(self, tracker):
+        """Serialise at most max_events events, restoring slot values dropped with older ones"""
+        events = list(tracker.events)
+        if len(events) < self.max_events:
+            return self.serialise_tracker(tracker)
+
+        slots = [(name, slot.value) for name, slot in tracker.slots.items()
+                 if slot.value != slot.initial_value]
+        # The restoring SlotSets count towards the cap, otherwise the deque
+        # rebuilt on retrieve (max_event_history) would drop them first
+        kept = events[-max(self.max_events - len(slots), 1):]
+        restore = [SlotSet(name, value, timestamp=kept[0].timestamp) for name, value in slots]
+        self.max_event_history = max(self.max_event_history, len(restore) + len(kept))
+        self.stats["compacted"] += 1
+        return json.dumps(Dialogue(tracker.sender_id, restore + kept).as_dict())
+
+    # --- TrackerStore interface ---
+
+    async def save(self, tracker):
+        await self.stream_events(tracker)
+        serialised = self._compact(tracker)
+        self._remember(tracker.sender_id, serialised)
+        await self._run(self._db_write, tracker.sender_id, serialised)
+        await self._sweep()
+
+    async def keys(self):
+        return await self._run(self._db_keys)
+
+    async def retrieve(self, sender_id):
+        return await self._retrieve(sender_id, fetch_all_sessions=False)
+
+    async def retrieve_full_tracker(self, conversation_id):
+        return await self._retrieve(conversation_id, fetch_all_sessions=True)
+
+    async def _retrieve(self, sender_id, fetch_all_sessions):
+        cached = self._cache.get(sender_id)
+        if cached:
+            self.stats["hits"] += 1
+            serialised = cached[0]
+        else:
+            self.stats["misses"] += 1
+            serialised = await self._run(self._db_read, sender_id)
+            if serialised is None:
+                return None
+        self._remember(sender_id, serialised)
+
+        tracker = self.deserialise_tracker(sender_id, serialised)
+        if not tracker or fetch_all_sessions:
+            return tracker
+        sessions = rasa.shared.core.trackers.get_trackers_for_conversation_sessions(tracker)
+        return tracker if len(sessions) <= 1 else sessions[-1]
@@ -0,0 +1,204 @@
+"""Soak test: Rasa server memory under a long stream of short web sessions
+
+Drives the REST webhook with many senders (each a short conversation built
+from data/nlu.yml examples), samples the Rasa process RSS and reports whether
+memory stays flat. Run it once with the default in-memory tracker store and
+once with DaliTrackerStore (endpoints.yml) to compare.
+
+Messages of intents whose actions touch the host (shutdown, restart, apps,
+music, volume) are never sent. A misclassified message can still trigger one
+of those actions, so run the soak WITHOUT the action server (`rasa run
+actions`), or with action_endpoint in endpoints.yml pointing at a stub; the
+failed action calls do not affect the tracker store being measured.
+
+Usage (from backend/rasa, with `rasa run --enable-api` already running and
+no action server):
+    python soak_test.py --hours 24 --sessions-per-minute 120
+"""
+
+import argparse
+import csv
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import requests
+
+from benchmark import load_nlu_messages
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Intents whose custom actions shut down the PC, open apps, play music or change volume
+SIDE_EFFECT_INTENTS = {
+    "shutdown_pc", "restart_pc", "open_app", "close_app",
+    "play_music", "change_music", "stop_music", "volume_up", "volume_down",
+}
+
+
+def find_rasa_process(port):
+    """The process listening on `port`, falling back to a `rasa run` command line"""
+    try:
+        for conn in psutil.net_connections(kind="tcp"):
+            if conn.laddr and conn.laddr.port == port and conn.status == psutil.CONN_LISTEN and conn.pid:
+                return psutil.Process(conn.pid)
+    except psutil.AccessDenied:
+        pass
+    for proc in psutil.process_iter(["cmdline"]):
+        cmdline = " ".join(proc.info.get("cmdline") or [])
+        if "rasa" in cmdline and " run" in cmdline and "actions" not in cmdline:
+            return proc
+    return None
+
+
+def rss_mb(proc):
+    """RSS of the process and its children (the Sanic server may fork workers)"""
+    total = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / 1e6
+
+
+class Traffic:
+    def __init__(self, url, messages, turns, timeout=10):
+        self.url = url
+        self.messages = messages
+        self.turns = turns
+        self.timeout = timeout
+        self.sessions = 0
+        self.turns_sent = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _http(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def run_session(self):
+        sender = f"soak_{uuid.uuid4().hex[:12]}"
+        for text in random.sample(self.messages, min(self.turns, len(self.messages))):
+            try:
+                self._http().post(self.url, json={"sender": sender, "message": text},
+                                  timeout=self.timeout).raise_for_status()
+                with self._lock:
+                    self.turns_sent += 1
+            except requests.RequestException:
+                with self._lock:
+                    self.errors += 1
+        with self._lock:
+            self.sessions += 1
+
+
+def run_soak(url, port, hours, sessions_per_minute, turns, workers, sample_seconds, out_path, max_growth_mb):
+    proc = find_rasa_process(port)
+    if not proc:
+        logger.error(f"No Rasa server found on port {port}")
+        return 1
+
+    traffic = Traffic(url, load_nlu_messages(exclude_intents=SIDE_EFFECT_INTENTS), turns)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soak")
+    interval = 60.0 / sessions_per_minute
+    end = time.monotonic() + hours * 3600
+    next_session = next_sample = time.monotonic()
+    samples = []
+    pending = set()
+
+    logger.info(f"Soaking Rasa pid {proc.pid} for {hours}h at {sessions_per_minute} sessions/min")
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["elapsed_s", "rss_mb", "sessions", "turns", "errors"])
+        start = time.monotonic()
+        try:
+            while time.monotonic() < end:
+                now = time.monotonic()
+                if now >= next_session:
+                    future = pool.submit(traffic.run_session)
+                    pending.add(future)
+                    future.add_done_callback(pending.discard)
+                    next_session += interval
+                if now >= next_sample:
+                    sample = (round(now - start), round(rss_mb(proc), 1),
+                              traffic.sessions, traffic.turns_sent, traffic.errors)
+                    samples.append(sample)
+                    writer.writerow(sample)
+                    f.flush()
+                    logger.info(f"{sample[0]}s: {sample[1]} MB, {sample[2]} sessions, "
+                                f"{sample[3]} turns, {sample[4]} errors")
+                    next_sample += sample_seconds
+                time.sleep(max(0.0, min(next_session, next_sample) - time.monotonic()))
+        except KeyboardInterrupt:
+            logger.info("Stopped early")
+        finally:
+            # Drop sessions still queued (shutdown's cancel_futures needs Python 3.9)
+            for future in list(pending):
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    return report(samples, max_growth_mb)
+
+
+def report(samples, max_growth_mb):
+    if len(samples) < 10:
+        logger.warning("Too few samples to judge memory growth")
+        return 1
+
+    # Skip the first 10% (model load, caches, first trackers) as warm-up
+    tenth = len(samples) // 10
+    baseline = statistics.median(s[1] for s in samples[tenth:2 * tenth])
+    final = statistics.median(s[1] for s in samples[-tenth:])
+    steady = samples[tenth:]
+    hours = [(s[0] - steady[0][0]) / 3600 for s in steady]
+    slope = _slope(hours, [s[1] for s in steady])
+    growth = final - baseline
+
+    print("\n📊 SOAK TEST")
+    print("=" * 60)
+    print(f"Sessions: {samples[-1][2]}, turns: {samples[-1][3]}, errors: {samples[-1][4]}")
+    print(f"RSS after warm-up: {baseline:.1f} MB, at end: {final:.1f} MB ({growth:+.1f} MB)")
+    print(f"Trend: {slope:+.2f} MB/hour")
+    flat = growth <= max_growth_mb
+    print(f"{'✅ Memory flat' if flat else '❌ Memory grew'} (limit {max_growth_mb} MB)")
+    print("=" * 60)
+    return 0 if flat else 1
+
+
+def _slope(xs, ys):
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rasa tracker store soak test")
+    parser.add_argument("--url", default="http://localhost:5005/webhooks/rest/webhook")
+    parser.add_argument("--port", type=int, default=5005, help="Port of the Rasa server to measure")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--sessions-per-minute", type=float, default=60)
+    parser.add_argument("--turns", type=int, default=4, help="Messages per simulated session")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--sample-seconds", type=float, default=60)
+    parser.add_argument("--out", default="soak_results.csv")
+    parser.add_argument("--max-growth-mb", type=float, default=50)
+    args = parser.parse_args(argv)
+
+    return run_soak(args.url, args.port, args.hours, args.sessions_per_minute, args.turns,
+                    args.workers, args.sample_seconds, os.path.join(BASE_DIR, args.out),
+                    args.max_growth_mb)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 """Rasa chatbot integration"""
 
+import json
+import re
 import requests
 import logging
 
@@ -36,3 +38,68 @@ def get_rasa_reply(message, rasa_url, retries=2, timeout=5):
             continue
     
     return "Sorry, I couldn't reach the assistant right now. Please check if Rasa is running."
+
+
+# Sentence end followed by whitespace: ". ", "! ", "? " and the Devanagari danda
+_SENTENCE_END = re.compile(r"(?<=[.!?\u0964])\s+")
+# A period after these does not end a sentence ("Dr. Rao", "e.g. Chrome", "J. R. R. Tolkien")
+_ABBREVIATION = re.compile(r"(?:\b(?:mr|mrs|ms|dr|prof|st|vs|e\.g|i\.e)|(?<![\w.])[a-z])\.$", re.IGNORECASE)
+
+def split_sentences(text):
+    """Split a bot message into sentences for incremental TTS"""
+    sentences = []
+    for part in _SENTENCE_END.split(text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and _ABBREVIATION.search(sentences[-1]):
+            sentences[-1] += " " + part
+        else:
+            sentences.append(part)
+    return sentences
+
+def stream_rasa_replies(message, rasa_url, sender="voice_user", retries=2, timeout=5):
+    """Yield each bot message as soon as Rasa produces it
+    
+    Uses the REST channel's ?stream=true mode, which sends one JSON object per
+    line while the actions run, instead of one array at the end of the turn.
+    """
+    payload = {"sender": sender, "message": message}
+    for attempt in range(retries):
+        yielded = False
+        try:
+            with requests.post(rasa_url, params={"stream": "true"}, json=payload,
+                               timeout=timeout, stream=True) as response:
+                if not response.ok:
+                    logger.error(f"Rasa error: HTTP {response.status_code}")
+                    continue
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    text = json.loads(line).get("text")
+                    if text:
+                        yielded = True
+                        yield text
+            if not yielded:
+                logger.warning("Rasa returned empty response")
+                yield "I'm not sure how to respond to that."
+            return
+        
+        except requests.exceptions.Timeout:
+            logger.error(f"Rasa timeout (attempt {attempt + 1}/{retries})")
+        except requests.exceptions.ConnectionError:
+            logger.error(f"Cannot connect to Rasa (attempt {attempt + 1}/{retries})")
+        except Exception as e:
+            logger.error(f"Rasa error (attempt {attempt + 1}/{retries}): {e}")
+        
+        # Never retry once part of the reply has been handed out
+        if yielded:
+            return
+    
+    yield "Sorry, I couldn't reach the assistant right now. Please check if Rasa is running."
+
+def stream_rasa_sentences(message, rasa_url, sender="voice_user", retries=2, timeout=5):
+    """Yield (message_index, sentence) pairs as Rasa replies arrive"""
+    for index, text in enumerate(stream_rasa_replies(message, rasa_url, sender, retries, timeout)):
+        for sentence in split_sentences(text):
+            yield index, sentence
@@ -0,0 +1,116 @@
+"""Speculative intent prediction from Vosk partial results
+
+While the user is still speaking, prefixes of the partial transcript that stay
+unchanged across several partial results are sent to Rasa's /model/parse
+endpoint in the background. If the final transcript equals one of those
+prefixes, the cached intent is sent to the webhook as "/intent{entities}",
+which skips NLU on the critical path. Anything else is discarded.
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+class SpeculativeParser:
+    def __init__(self, parse_url, min_words=2, stable_partials=2, min_confidence=0.8,
+                 timeout=2, workers=2):
+        self.parse_url = parse_url
+        self.min_words = min_words
+        self.stable_partials = stable_partials
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculate")
+        self._cache = {}          # normalized prefix -> Future[(parse result, parse ms)]
+        self._last_partial = ""
+        self._stable_count = 0
+        self.stats = {"speculated": 0, "hits": 0, "misses": 0, "not_ready": 0, "saved_ms": 0.0}
+
+    @classmethod
+    def from_config(cls, config):
+        spec = config.get("speculative_nlu", {})
+        if not spec.get("enabled"):
+            return None
+        parse_url = spec.get("parse_url") or config["rasa_url"].split("/webhooks/")[0] + "/model/parse"
+        return cls(
+            parse_url,
+            min_words=spec.get("min_words", 2),
+            stable_partials=spec.get("stable_partials", 2),
+            min_confidence=spec.get("min_confidence", 0.8),
+        )
+
+    def reset(self):
+        """Start a new utterance; cached parses are per utterance"""
+        self._cache.clear()
+        self._last_partial = ""
+        self._stable_count = 0
+
+    def feed_partial(self, partial_text):
+        """Call with every PartialResult() text; speculates once a prefix is stable"""
+        text = _normalize(partial_text)
+        if not text:
+            return
+        if text == self._last_partial:
+            self._stable_count += 1
+        else:
+            self._last_partial = text
+            self._stable_count = 1
+
+        if (self._stable_count >= self.stable_partials
+                and len(text.split()) >= self.min_words
+                and text not in self._cache):
+            self._cache[text] = self._executor.submit(self._parse, text)
+            self.stats["speculated"] += 1
+
+    def _parse(self, text):
+        start = time.perf_counter()
+        response = requests.post(self.parse_url, json={"text": text}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), (time.perf_counter() - start) * 1000
+
+    def resolve(self, final_text):
+        """Return the message to send for `final_text`: a "/intent{...}" shortcut
+        when speculation hit, otherwise the text itself."""
+        text = _normalize(final_text)
+        future = self._cache.get(text)
+        if future is None:
+            if self._cache:
+                self.stats["misses"] += 1
+            return final_text
+        if not future.done():
+            # Waiting would put the parse back on the critical path
+            self.stats["not_ready"] += 1
+            return final_text
+        try:
+            result, parse_ms = future.result()
+        except Exception as e:
+            logger.debug(f"Speculative parse failed: {e}")
+            self.stats["misses"] += 1
+            return final_text
+
+        intent = result.get("intent") or {}
+        if not intent.get("name") or intent.get("confidence", 0) < self.min_confidence:
+            self.stats["misses"] += 1
+            return final_text
+
+        self.stats["hits"] += 1
+        self.stats["saved_ms"] += parse_ms
+        entities = {e["entity"]: e["value"] for e in result.get("entities", []) if "entity" in e}
+        return f"/{intent['name']}{json.dumps(entities) if entities else ''}"
+
+    def summary(self):
+        resolved = self.stats["hits"] + self.stats["misses"] + self.stats["not_ready"]
+        hit_rate = self.stats["hits"] / resolved if resolved else 0.0
+        avg_saved = self.stats["saved_ms"] / self.stats["hits"] if self.stats["hits"] else 0.0
+        return (f"{self.stats['hits']}/{resolved} hits ({hit_rate:.0%}), "
+                f"{self.stats['speculated']} speculative parses, "
+                f"~{avg_saved:.0f} ms saved per hit ({self.stats['saved_ms']:.0f} ms total)")
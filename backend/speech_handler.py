@@ -1,27 +1,43 @@
 """Speech and TTS handler for DALI Voice Assistant (Offline Vosk + pyttsx3)"""
 
-import pyttsx3
+import queue
 import threading
 
-tts_lock = threading.Lock()
+# Utterances are spoken in order by one worker, so sentences queued while the
+# first one is being synthesized start as soon as it finishes
+_tts_queue = queue.Queue()
+_tts_worker = None
+_tts_worker_lock = threading.Lock()
 
-def speak_async(text, lang="english", rate=170):
-    """Speak asynchronously with pyttsx3."""
-    def run():
-        with tts_lock:
-            try:
+def _tts_loop():
+    tts = None
+    while True:
+        text, lang, rate = _tts_queue.get()
+        try:
+            if tts is None:
+                import pyttsx3
                 tts = pyttsx3.init(driverName='sapi5')
-                tts.setProperty("rate", rate)
-                voices = tts.getProperty('voices')
-                if lang == "hindi" and len(voices) > 1:
-                    tts.setProperty("voice", voices[1].id)
-                else:
-                    tts.setProperty("voice", voices[0].id)
-                tts.say(text)
-                tts.runAndWait()
-            except Exception as e:
-                print(f"TTS error: {e}")
-    threading.Thread(target=run, daemon=True).start()
+            tts.setProperty("rate", rate)
+            voices = tts.getProperty('voices')
+            if lang == "hindi" and len(voices) > 1:
+                tts.setProperty("voice", voices[1].id)
+            else:
+                tts.setProperty("voice", voices[0].id)
+            tts.say(text)
+            tts.runAndWait()
+        except Exception as e:
+            print(f"TTS error: {e}")
+        finally:
+            _tts_queue.task_done()
+
+def speak_async(text, lang="english", rate=170):
+    """Queue text for speech with pyttsx3 and return immediately."""
+    global _tts_worker
+    with _tts_worker_lock:
+        if _tts_worker is None:
+            _tts_worker = threading.Thread(target=_tts_loop, name="tts", daemon=True)
+            _tts_worker.start()
+    _tts_queue.put((text, lang, rate))
 
 
 def cleanup_audio(stream, mic):
@@ -0,0 +1,95 @@
+"""Startup-time benchmark for the DALI WebSocket server
+
+Starts backend/websocket_server.py in each startup mode and measures:
+  - time to first accepted connection
+  - time until wake word detection is armed (earliest possible first wake)
+
+Usage (from the project root):
+    python backend/startup_benchmark.py [--modes lazy eager] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import websockets
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_URL = "ws://localhost:8765"
+
+
+async def _connect_with_retry(deadline):
+    while time.perf_counter() < deadline:
+        try:
+            return await websockets.connect(SERVER_URL)
+        except (OSError, websockets.exceptions.InvalidHandshake):
+            await asyncio.sleep(0.02)
+    raise TimeoutError("Server did not accept a connection in time")
+
+
+async def measure_once(mode, timeout=300):
+    env = dict(os.environ, DALI_STARTUP_MODE=mode)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join("backend", "websocket_server.py")],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = start + timeout
+    try:
+        ws = await _connect_with_retry(deadline)
+        connect_s = time.perf_counter() - start
+        components = {}
+        try:
+            # Server-side timings are relative to its own process start
+            await ws.send(json.dumps({"type": "status"}))
+            while time.perf_counter() < deadline:
+                msg = json.loads(await asyncio.wait_for(ws.recv(), deadline - time.perf_counter()))
+                if msg.get("type") == "ready":
+                    components = msg.get("components", {})
+                    if msg.get("ready"):
+                        break
+        finally:
+            await ws.close()
+        return {
+            "connect_s": connect_s,
+            "wake_word_s": components.get("wake_word"),
+        }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return "n/a"
+    return f"{statistics.median(values):.2f}s (min {min(values):.2f}s)"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DALI startup-time benchmark")
+    parser.add_argument("--modes", nargs="+", default=["lazy", "eager"])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print("\n⏱️ STARTUP BENCHMARK")
+    print("=" * 60)
+    for mode in args.modes:
+        runs = [asyncio.run(measure_once(mode)) for _ in range(args.runs)]
+        print(f"[{mode}]")
+        print(f"  First accepted connection: {_summary(r['connect_s'] for r in runs)}")
+        print(f"  Wake word armed:           {_summary(r['wake_word_s'] for r in runs)}")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
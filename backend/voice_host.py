@@ -0,0 +1,250 @@
+"""Multi-device voice host: one process, N microphones, one set of Vosk models
+
+Each input device gets its own recognizer, wake/command state, language and DB
+session. All devices share the read-only vosk.Model instances, and decoding
+runs on a worker pool sized to the available cores; chunks of one device are
+always decoded in order by a single worker at a time.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .speech_handler import speak_async
+from .language_handler import load_models, detect_language
+from .database_handler import ConversationDB
+from .rasa_handler import stream_rasa_sentences
+from .audio_capture import AdaptiveCapture
+
+COMMAND_TIMEOUT = 8
+
+
+def list_input_devices():
+    """(index, name) of every audio device that can record"""
+    import pyaudio
+
+    pa = pyaudio.PyAudio()
+    try:
+        return [(i, pa.get_device_info_by_index(i)["name"])
+                for i in range(pa.get_device_count())
+                if pa.get_device_info_by_index(i).get("maxInputChannels", 0) > 0]
+    finally:
+        pa.terminate()
+
+
+class DeviceSession:
+    """State of one microphone: recognizer, wake state, language and DB session"""
+
+    def __init__(self, host, device_index, name):
+        self.host = host
+        self.device_index = device_index
+        self.name = name
+        self.label = f"[mic {device_index}]"
+        self.language = "english"
+        self.mode = "wake"          # "wake" -> "command" -> back to "wake"
+        self.command_started = 0.0
+        self.recognizer = host.new_recognizer(self.language)
+        self.session_id = (f"device{device_index}_session_"
+                           f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}")
+        self.conversations = 0
+        self.capture = None
+
+        self._inbox = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._pending_language = None   # set by the turn thread, applied by the decode side
+
+    def enqueue(self, chunk):
+        """Called from the capture thread; schedules a drain if none is pending"""
+        with self._lock:
+            self._inbox.append(chunk)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.host.decode_pool.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._inbox:
+                    self._scheduled = False
+                    return
+                chunk = self._inbox.popleft()
+            try:
+                self._decode(chunk)
+            except Exception as e:
+                print(f"{self.label} decode error: {e}")
+
+    def switch_language(self, lang):
+        """Called from a turn; the recognizer is only ever replaced on the decode side"""
+        with self._lock:
+            self._pending_language = lang
+
+    def clear(self):
+        """Drop chunks not yet decoded"""
+        with self._lock:
+            self._inbox.clear()
+
+    def _decode(self, chunk):
+        with self._lock:
+            lang, self._pending_language = self._pending_language, None
+        if lang:
+            self.language = lang
+            self.recognizer = self.host.new_recognizer(lang)
+
+        if self.mode == "command" and time.time() - self.command_started > COMMAND_TIMEOUT:
+            self._to_wake()
+            self.host.speak("I didn’t catch that.", self.language)
+            return
+
+        start = time.perf_counter()
+        final = self.recognizer.AcceptWaveform(chunk)
+        self.capture.record_decode(chunk, time.perf_counter() - start)
+        if not final:
+            return
+        text = json.loads(self.recognizer.Result()).get("text", "").strip()
+        if not text:
+            return
+
+        if self.mode == "wake":
+            if re.search(r"\b(hey|hello)\s*dali\b", text.lower()):
+                print(f"{self.label} 🎯 Wake word detected!")
+                self.mode = "command"
+                self.command_started = time.time()
+                self.recognizer = self.host.new_recognizer(self.language)
+                self.host.speak("I'm listening.", self.language)
+        else:
+            self._to_wake()
+            self.host.submit_turn(self._handle_command, text)
+
+    def _to_wake(self):
+        self.mode = "wake"
+        self.recognizer = self.host.new_recognizer(self.language)
+
+    def _handle_command(self, command):
+        print(f"{self.label} 🧑 You said: {command}")
+        self.conversations += 1
+        db = self.host.db
+
+        language = self.language
+        detected = detect_language(command, language)
+        if detected != language and detected in self.host.models:
+            db.log_language_switch(self.session_id, language, detected)
+            language = detected
+            # The decode side swaps the recognizer before its next chunk
+            self.switch_language(detected)
+            self.host.speak(f"Language switched to {detected}", detected)
+
+        sentences = []
+        for _, sentence in stream_rasa_sentences(command, self.host.config['rasa_url'], sender=self.session_id):
+            print(f"{self.label} 🤖 DALI: {sentence}")
+            self.host.speak(sentence, language)
+            sentences.append(sentence)
+        db.add_conversation(session_id=self.session_id, user_input=command,
+                            bot_response=" ".join(sentences), language=language)
+
+
+class VoiceHost:
+    def __init__(self, config, device_indices, models=None, decode_workers=None):
+        self.config = config
+        self.sample_rate = config['sample_rate']
+        self.db = ConversationDB(config.get('database', {}).get('path', 'conversations.db'))
+        # Loaded once and shared read-only by every device's recognizers
+        self.models = models if models is not None else load_models(config['model_paths'])
+        if "english" not in self.models:
+            raise RuntimeError("English Vosk model is required for wake word detection")
+
+        self.decode_workers = decode_workers or os.cpu_count() or 2
+        self.decode_pool = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode")
+        self.turn_pool = ThreadPoolExecutor(max_workers=max(2, len(device_indices)), thread_name_prefix="turn")
+        self.device_indices = device_indices
+        self.devices = []
+        self._threads = []
+        self._turns = set()     # queued or running turn futures
+        self._running = False
+        self._mic = None
+
+    def new_recognizer(self, lang):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.models[lang], self.sample_rate)
+
+    def speak(self, text, lang):
+        speak_async(text, lang, self.config['tts_rate'])
+
+    def submit_turn(self, func, *args):
+        future = self.turn_pool.submit(func, *args)
+        self._turns.add(future)
+        future.add_done_callback(self._turns.discard)
+
+    def _capture(self, device):
+        while self._running:
+            try:
+                chunk = device.capture.read()
+                if device.capture.should_decode(chunk):
+                    device.enqueue(chunk)
+            except Exception as e:
+                print(f"{device.label} mic error: {e}")
+                time.sleep(0.1)
+
+    def run(self):
+        import pyaudio
+
+        self._mic = pyaudio.PyAudio()
+        try:
+            names = dict(list_input_devices())
+            # Streams opened before a failing device are still closed by stop()
+            for index in self.device_indices:
+                device = DeviceSession(self, index, names.get(index, f"device {index}"))
+                device.capture = AdaptiveCapture.from_config(
+                    self._mic, self.config, input_device_index=index, name=device.label
+                ).open()
+                self.db.start_session(device.session_id)
+                self.devices.append(device)
+                print(f"{device.label} 🎤 {device.name} → {device.session_id}")
+
+            self._running = True
+            self._threads = [threading.Thread(target=self._capture, args=(d,), daemon=True) for d in self.devices]
+            for t in self._threads:
+                t.start()
+            print(f"🎤 DALI is listening on {len(self.devices)} devices "
+                  f"({self.decode_workers} decode workers). Say 'Hey Dali'.")
+
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping DALI...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._running = False
+        # A capture thread may be blocked in stream.read(); a read returns within
+        # one chunk, so wait for the threads before closing their streams
+        for t in self._threads:
+            t.join(timeout=2)
+        for device in self.devices:
+            device.capture.close()
+            self.db.log_audio_stats(device.session_id, device.name, device.capture.stats.snapshot())
+            self.db.end_session(device.session_id)
+        if self._mic:
+            self._mic.terminate()
+        # Executor.shutdown(cancel_futures=...) needs Python 3.9; drop queued work by hand
+        for device in self.devices:
+            device.clear()
+        for future in list(self._turns):
+            future.cancel()
+        self.decode_pool.shutdown(wait=False)
+        self.turn_pool.shutdown(wait=False)
+
+        print("\n📊 SESSION SUMMARY")
+        print("=" * 60)
+        for device in self.devices:
+            print(f"{device.label} {device.name}: {device.conversations} conversations, "
+                  f"{device.capture.stats.summary()}")
+        print("=" * 60)
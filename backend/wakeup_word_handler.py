@@ -5,6 +5,9 @@ import threading
 import asyncio
 import logging
 import os
+import time
+
+from audio_capture import AdaptiveCapture
 
 logger = logging.getLogger(__name__)
 
@@ -42,15 +45,19 @@ class WakeWordDetector:
             sensitivities=[sensitivity] * len(keyword_paths)
         )
         
-        # Initialize PyAudio
+        # Initialize PyAudio; reads are whole Porcupine frames, batched when processing lags
+        frame_length = self.porcupine.frame_length
         self.pa = pyaudio.PyAudio()
-        self.stream = self.pa.open(
-            rate=self.porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=self.porcupine.frame_length
-        )
+        self.capture = AdaptiveCapture.from_config(
+            self.pa, config,
+            sample_rate=self.porcupine.sample_rate,
+            chunk_frames=frame_length,
+            frames_per_buffer=frame_length,
+            max_frames_per_buffer=frame_length * 16,
+            max_chunk_frames=frame_length * 8,
+            frame_multiple=frame_length,
+            name="wake word mic",
+        ).open()
         
         self.on_wake_callback = on_wake_callback
         self.timeout_seconds = timeout
@@ -104,9 +111,17 @@ class WakeWordDetector:
         
         while self._listening:
             try:
-                pcm = self.stream.read(self.porcupine.frame_length, exception_on_overflow=False)
-                pcm = struct.unpack_from("h" * self.porcupine.frame_length, pcm)
-                result = self._safe_process(pcm)
+                chunk = self.capture.read()
+                if not self.capture.should_decode(chunk):
+                    continue
+                start = time.perf_counter()
+                frame_length = self.porcupine.frame_length
+                frames = len(chunk) // 2 // frame_length
+                result = -1
+                for i in range(frames):
+                    pcm = struct.unpack_from("h" * frame_length, chunk, i * frame_length * 2)
+                    result = max(result, self._safe_process(pcm))
+                self.capture.record_decode(chunk, time.perf_counter() - start)
                 
                 # result >= 0 means wake word detected
                 if result >= 0:
@@ -125,7 +140,6 @@ class WakeWordDetector:
                             
             except Exception as e:
                 logger.error(f"Mic stream error: {e}")
-                import time
                 time.sleep(0.1)
 
     def stop(self):
@@ -134,9 +148,9 @@ class WakeWordDetector:
         if self._timer:
             self._timer.cancel()
         
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        if self.capture:
+            self.capture.close()
+            logger.info(f"Wake word capture: {self.capture.stats.summary()}")
         if self.pa:
             self.pa.terminate()
         if self.porcupine:
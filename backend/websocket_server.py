@@ -2,18 +2,26 @@ import asyncio
 import websockets
 import json
 import os
+import time
+import secrets
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
 import uuid
+import re
 import logging
-import requests
 
-from wakeup_word_handler import WakeWordDetector
-from language_handler import load_models, detect_language
+from language_handler import detect_language
 from database_handler import ConversationDB
+from protocol import SUBPROTOCOLS, Channel, decode
+from admission import AdmissionController, Busy
+from asr_client import AsrStream, DEFAULT_URL
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+STARTED_AT = time.perf_counter()
+
 config_path = os.path.join(os.path.dirname(__file__), "config.json")
 
 with open(config_path, "r") as f:
@@ -21,27 +29,71 @@ with open(config_path, "r") as f:
 
 db = ConversationDB(config.get("database", {}).get("path", "conversations.db"))
 
-try:
-    models = load_models(config.get("model_paths", {}))
-    logger.info("✓ Vosk models loaded")
-except Exception as e:
-    logger.warning(f"⚠ Vosk models not loaded: {e}")
-    models = {}
+admission = AdmissionController.from_config(config.get("admission", {}))
+
+# When enabled, browser audio is decoded by the shared ASR service (asr_service.py)
+asr_config = config.get("asr_service", {})
+
+# Seconds since process start at which each component became ready (None = not yet)
+readiness = {"server": None, "wake_word": None}
 
+# client_id -> session state of a connected socket
 clients = {}
+# resume token -> session state, kept for a short window after a disconnect
+sessions = {}
 voice_mode = False
 ww_detector = None
 
+def _elapsed():
+    return round(time.perf_counter() - STARTED_AT, 3)
+
+def readiness_message():
+    return {
+        "type": "ready",
+        "ready": all(v is not None for v in readiness.values()),
+        "components": dict(readiness),
+    }
+
+SESSION_RESUME_SECONDS = config.get("session_resume_seconds", 120)
+RESUME_BUFFER_SIZE = config.get("resume_buffer_size", 100)
+# Close code for a socket whose session was taken over; clients must not reconnect on it
+SESSION_TAKEOVER_CODE = 4001
+
+async def send_event(session, event):
+    """Number an outbound event, buffer it for resumption and send it if connected"""
+    session["seq"] += 1
+    event = dict(event, seq=session["seq"])
+    session["outbox"].append(event)
+    channel = session["channel"]
+    if channel:
+        try:
+            await channel.send(event)
+        except websockets.ConnectionClosed:
+            # The turn keeps running; the rest goes to the outbox for a resuming client
+            if session["channel"] is channel:
+                session["channel"] = None
+
+async def broadcast(event):
+    # A session taken over by a new socket can briefly appear under two client ids
+    unique = {id(client): client for client in clients.values()}.values()
+    if unique:
+        await asyncio.gather(*[send_event(client, event) for client in unique], return_exceptions=True)
+
+async def mark_ready(component):
+    readiness[component] = _elapsed()
+    logger.info(f"✓ {component} ready after {readiness[component]:.2f}s")
+    await broadcast(readiness_message())
+
 async def on_wake_word_detected(enable: bool):
     global voice_mode
     voice_mode = enable
-    message = json.dumps({"event": "voice_mode", "enabled": voice_mode})
-    if clients:
-        await asyncio.gather(*[client["websocket"].send(message) for client in clients.values()], return_exceptions=True)
+    await broadcast({"event": "voice_mode", "enabled": voice_mode})
     logger.info(f"Voice mode {'enabled' if enable else 'disabled'} notified to {len(clients)} clients")
 
 def start_wake_word_detector(loop):
     try:
+        # Imports pvporcupine and opens the mic, so it is kept off the import path
+        from wakeup_word_handler import WakeWordDetector
         detector = WakeWordDetector(config=config, on_wake_callback=on_wake_word_detected, loop=loop)
         detector.start()
         logger.info("✓ Wake word detector started")
@@ -50,121 +102,352 @@ def start_wake_word_detector(loop):
         logger.error(f"✗ Wake word detector error: {e}")
         return None
 
-def get_rasa_reply(message, timeout=5):
-    try:
-        payload = {"sender": "web_user", "message": message}
-        response = requests.post(config['rasa_url'], json=payload, timeout=timeout)
-        if response.ok:
-            data = response.json()
-            replies = [d.get("text") for d in data if "text" in d]
-            if replies:
-                return " ".join(replies)
-        logger.warning("Rasa returned empty response")
-        return "I'm not sure how to respond to that."
-    except requests.exceptions.Timeout:
-        logger.error("Rasa request timeout")
-        return "Sorry, I'm taking too long to respond."
-    except requests.exceptions.ConnectionError:
-        logger.error("Cannot connect to Rasa server")
-        return "Sorry, I couldn't reach the assistant. Please check if Rasa is running."
-    except Exception as e:
-        logger.error(f"Rasa error: {e}")
-        return "An error occurred while processing your request."
+async def stream_reply_sentences(message, sender):
+    """Yield (message_index, sentence) from Rasa as they arrive, without blocking the loop"""
+    from rasa_handler import stream_rasa_sentences
 
-async def handle_client(websocket, path):
-    client_id = str(uuid.uuid4())
-    session_id = f"web_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{client_id[:8]}"
-    clients[client_id] = {
-        "websocket": websocket,
+    loop = asyncio.get_running_loop()
+    parts = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for item in stream_rasa_sentences(message, config['rasa_url'], sender=sender):
+                loop.call_soon_threadsafe(parts.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(parts.put_nowait, done)
+
+    loop.run_in_executor(None, produce)
+    while (item := await parts.get()) is not done:
+        yield item
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+# Persistent per-browser key (?client_key=...); history spans every session opened with it
+CLIENT_KEY = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+def parse_client_key(path):
+    """The ?client_key=<key> of the URL if well-formed, else None"""
+    key = parse_qs(urlparse(path or "").query).get("client_key", [None])[0]
+    return key if key and CLIENT_KEY.fullmatch(key) else None
+
+def parse_history_request(data, session_id):
+    """(before_id, limit) of a history request; ValueError if malformed or for another session"""
+    if data.get("session_id") not in (None, session_id):
+        raise ValueError("history is only available for this session")
+    before_id, limit = data.get("before_id"), data.get("limit", HISTORY_PAGE_SIZE)
+    if before_id is not None and (type(before_id) is not int or before_id < 1):
+        raise ValueError("before_id must be a positive integer")
+    if type(limit) is not int or limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return before_id, min(limit, HISTORY_MAX_PAGE_SIZE)
+
+def get_history_page(session, before_id=None, limit=HISTORY_PAGE_SIZE):
+    """One keyset-paginated page of history, oldest first
+
+    Covers every session of the session's client key, so a reload or a new tab
+    of the same browser sees earlier conversations; without a key only this session.
+    """
+    if session["client_key"]:
+        rows, has_more = db.get_client_history_page(session["client_key"], before_id, limit)
+    else:
+        rows, has_more = db.get_session_history_page(session["session_id"], before_id, limit)
+    return {
+        "type": "history",
+        "session_id": session["session_id"],
+        "messages": [{
+            "id": row["id"],
+            "user": row["user_input"],
+            "bot": row["bot_response"],
+            "language": row["language"],
+            "timestamp": row["timestamp"],
+        } for row in rows],
+        "has_more": has_more,
+        "next_before_id": rows[0]["id"] if rows and has_more else None,
+    }
+
+def new_session(client_key=None):
+    session_id = f"web_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    session = {
         "session_id": session_id,
+        "resume_token": secrets.token_urlsafe(24),
+        "client_key": client_key,
         "language": "english",
         "connected_at": datetime.now(),
-        "tts_enabled": True
+        "tts_enabled": True,
+        "seq": 0,
+        "replies": 0,
+        "bucket": admission.new_bucket(),
+        "outbox": deque(maxlen=RESUME_BUFFER_SIZE),
+        "websocket": None,
+        "channel": None,
+        "expiry": None,
+        "asr": None,
     }
-    db.start_session(session_id)
-    logger.info(f"Client {client_id[:8]} connected")
+    sessions[session["resume_token"]] = session
+    db.start_session(session_id, client_key)
+    return session
+
+def resume_session(path):
+    """Return (session, last_seq) for a valid ?resume=<token> in the URL, else (None, None)"""
+    query = parse_qs(urlparse(path or "").query)
+    token = query.get("resume", [None])[0]
+    session = sessions.get(token) if token else None
+    if not session:
+        return None, None
+    if session["expiry"]:
+        session["expiry"].cancel()
+        session["expiry"] = None
+    last_seq = query.get("last_seq", [None])[0]
+    return session, int(last_seq) if last_seq and last_seq.isdigit() else None
+
+def expire_session(token):
+    session = sessions.pop(token, None)
+    if session:
+        db.end_session(session["session_id"])
+        logger.info(f"Session {session['session_id']} expired")
+
+async def handle_client(websocket, path):
+    client_id = str(uuid.uuid4())
+    channel = Channel(websocket, websocket.subprotocol)
+
+    session, last_seq = resume_session(path)
+    resumed = session is not None
+    if not resumed:
+        session = new_session(parse_client_key(path))
+    elif session["websocket"]:
+        # A half-open socket (or another tab with the same token) still holds the
+        # session; the new connection takes over
+        asyncio.get_running_loop().create_task(
+            session["websocket"].close(SESSION_TAKEOVER_CODE, "session resumed elsewhere"))
+    session_id = session["session_id"]
+    session["websocket"] = websocket
+    session["channel"] = channel
+    clients[client_id] = session
+    logger.info(f"Client {client_id[:8]} {'resumed' if resumed else 'connected'} {session_id} ({channel.protocol})")
 
     try:
-        await websocket.send(json.dumps({
+        await send_event(session, {
             "type": "system",
-            "message": "Connected to DALI Voice Assistant",
+            "message": "Reconnected to DALI Voice Assistant" if resumed else "Connected to DALI Voice Assistant",
             "session_id": session_id,
+            "resume_token": session["resume_token"],
+            "resumed": resumed,
             "voice_mode": voice_mode,
+            "ready": readiness_message()["ready"],
             "config": {
                 "sample_rate": config.get("sample_rate", 16000),
                 "tts_rate": config.get("tts_rate", 170),
             }
-        }))
+        })
+
+        # Replay only what the client missed while it was away
+        if resumed and last_seq is not None:
+            for event in list(session["outbox"]):
+                if last_seq < event["seq"] < session["seq"]:
+                    await channel.send(event)
 
         async for message in websocket:
-            data = json.loads(message)
-            msg_type = data.get("type")
+            for data in decode(message, channel.protocol):
+                await handle_event(client_id, data)
 
-            if msg_type == "text":
-                user_message = data.get("message", "").strip()
-                if not user_message:
-                    continue
+    except websockets.exceptions.ConnectionClosed:
+        logger.info(f"Client {client_id[:8]} disconnected")
+    except Exception as e:
+        logger.error(f"Client {client_id[:8]} error: {e}")
+    finally:
+        await channel.close()
+        # After a takeover the ASR stream belongs to the new socket
+        if session["websocket"] is websocket:
+            if session["asr"]:
+                await session["asr"].close()
+                session["asr"] = None
+            session["websocket"] = None
+            session["channel"] = None
+            session["expiry"] = asyncio.get_running_loop().call_later(
+                SESSION_RESUME_SECONDS, expire_session, session["resume_token"])
+        if client_id in clients:
+            del clients[client_id]
+        logger.info(f"Client {client_id[:8]} cleaned up")
 
-                logger.info(f"[{client_id[:8]}] User: {user_message}")
+async def handle_turn(client_id, user_message):
+    client = clients[client_id]
+    session_id = client["session_id"]
 
-                current_lang = clients[client_id]["language"]
-                detected_lang = detect_language(user_message, current_lang)
-                if detected_lang != current_lang:
-                    clients[client_id]["language"] = detected_lang
-                    db.log_language_switch(session_id, current_lang, detected_lang)
-                    logger.info(f"Language switched: {current_lang} -> {detected_lang}")
+    logger.info(f"[{client_id[:8]}] User: {user_message}")
 
-                bot_reply = get_rasa_reply(user_message)
-                logger.info(f"[{client_id[:8]}] Bot: {bot_reply}")
+    current_lang = client["language"]
+    detected_lang = detect_language(user_message, current_lang)
+    if detected_lang != current_lang:
+        client["language"] = detected_lang
+        db.log_language_switch(session_id, current_lang, detected_lang)
+        logger.info(f"Language switched: {current_lang} -> {detected_lang}")
 
-                db.add_conversation(session_id=session_id, user_input=user_message, bot_response=bot_reply,
-                                    language=detected_lang, confidence_score=1.0)
+    # Each sentence goes out (and to the client's TTS) as soon as Rasa produces it
+    client["replies"] += 1
+    reply_id = client["replies"]
+    sentences = []
+    async for _, sentence in stream_reply_sentences(user_message, session_id):
+        sentences.append(sentence)
+        await send_event(client, {
+            "type": "response_part",
+            "reply_id": reply_id,
+            "message": sentence,
+            "language": detected_lang,
+            "speak": client["tts_enabled"],
+        })
 
-                await websocket.send(json.dumps({
-                    "type": "response",
-                    "message": bot_reply,
-                    "language": detected_lang,
-                    "speak": clients[client_id]["tts_enabled"],
-                    "timestamp": datetime.now().isoformat()
-                }))
+    bot_reply = " ".join(sentences)
+    logger.info(f"[{client_id[:8]}] Bot: {bot_reply}")
 
-            elif msg_type == "audio" and voice_mode:
-                logger.info(f"[{client_id[:8]}] Audio input received")
-                # TODO: Handle voice input with Vosk ASR
-                pass
+    conversation_id = db.add_conversation(session_id=session_id, user_input=user_message,
+                                          bot_response=bot_reply, language=detected_lang,
+                                          confidence_score=1.0)
 
-            elif msg_type == "toggle_tts":
-                clients[client_id]["tts_enabled"] = data.get("enabled", True)
-                logger.info(f"TTS {'enabled' if clients[client_id]['tts_enabled'] else 'disabled'}")
+    # Full reply for clients that ignore response_part
+    await send_event(client, {
+        "type": "response",
+        "id": conversation_id,
+        "reply_id": reply_id,
+        "streamed": True,
+        "message": bot_reply,
+        "language": detected_lang,
+        "speak": client["tts_enabled"],
+        "timestamp": datetime.now()
+    })
 
-            elif msg_type == "ping":
-                await websocket.send(json.dumps({"type": "pong"}))
+async def admit_turn(client_id, user_message):
+    client = clients[client_id]
+    try:
+        admission.check_rate(client["bucket"])
+        async with admission.slot():
+            await handle_turn(client_id, user_message)
+    except Busy as e:
+        logger.warning(f"[{client_id[:8]}] Turn rejected: {e.reason} (retry after {e.retry_after}s)")
+        await send_event(client, {
+            "type": "busy",
+            "reason": e.reason,
+            "retry_after": e.retry_after,
+            "message": "DALI is busy right now, please try again shortly.",
+        })
 
-    except websockets.exceptions.ConnectionClosed:
-        logger.info(f"Client {client_id[:8]} disconnected")
+async def handle_audio(client_id, pcm):
+    """Stream one PCM chunk to the ASR service; a final transcript becomes a turn"""
+    client = clients[client_id]
+    try:
+        if client["asr"] is None:
+            client["asr"] = await AsrStream.connect(
+                asr_config.get("url", DEFAULT_URL), client["language"],
+                config.get("sample_rate", 16000), session_id=client["session_id"])
+        elif client["asr"].language != client["language"] and client["language"] in client["asr"].languages:
+            # The turn switched languages; move the open stream to that model
+            await client["asr"].set_language(client["language"])
+        result = await client["asr"].feed(pcm)
     except Exception as e:
-        logger.error(f"Client {client_id[:8]} error: {e}")
-    finally:
-        db.end_session(session_id)
-        if client_id in clients:
-            del clients[client_id]
-        logger.info(f"Client {client_id[:8]} cleaned up")
+        logger.error(f"[{client_id[:8]}] ASR service error: {e}")
+        client["asr"] = None
+        return
 
-async def main():
+    text = result.get("text" if result.get("final") else "partial", "").strip()
+    if not text:
+        return
+    await send_event(client, {"type": "transcript", "message": text, "final": result.get("final", False)})
+    if result.get("final"):
+        # Audio keeps flowing while the turn runs
+        asyncio.get_running_loop().create_task(admit_turn(client_id, text))
+
+async def handle_event(client_id, data):
+    client = clients[client_id]
+    session_id = client["session_id"]
+    msg_type = data.get("type")
+
+    if msg_type == "text":
+        user_message = data.get("message", "").strip()
+        if not user_message:
+            return
+        await admit_turn(client_id, user_message)
+
+    elif msg_type == "audio" and voice_mode:
+        if not asr_config.get("enabled"):
+            logger.info(f"[{client_id[:8]}] Audio input received ({len(data.get('data') or b'')} bytes), "
+                        f"ASR service disabled")
+            return
+        await handle_audio(client_id, data.get("data") or b"")
+
+    elif msg_type == "toggle_tts":
+        client["tts_enabled"] = data.get("enabled", True)
+        logger.info(f"TTS {'enabled' if client['tts_enabled'] else 'disabled'}")
+
+    elif msg_type == "history":
+        try:
+            before_id, limit = parse_history_request(data, session_id)
+        except ValueError as e:
+            await send_event(client, {"type": "error", "request": "history", "message": f"Bad history request: {e}"})
+            return
+        await send_event(client, get_history_page(client, before_id, limit))
+
+    elif msg_type == "metrics":
+        await send_event(client, {
+            "type": "metrics",
+            "admission": admission.snapshot(),
+            "capture": ww_detector.capture.stats.snapshot() if ww_detector else None,
+        })
+
+    elif msg_type == "status":
+        await send_event(client, readiness_message())
+
+    elif msg_type == "ping":
+        # Legacy application-level heartbeat; new clients rely on WebSocket pings
+        if client["channel"]:
+            await client["channel"].send({"type": "pong"})
+
+async def warm_up(loop):
+    """Start the wake word detector off the event loop
+
+    The server decodes no audio itself (text turns only need detect_language,
+    and audio goes to the ASR service when enabled), so no Vosk models are loaded here.
+    """
     global ww_detector
+
+    if asr_config.get("enabled"):
+        logger.info(f"✓ Using ASR service at {asr_config.get('url', DEFAULT_URL)}")
+
+    ww_detector = await loop.run_in_executor(None, start_wake_word_detector, loop)
+    if not ww_detector:
+        logger.warning("⚠ Wake word detector failed; continuing without it")
+    await mark_ready("wake_word")
+
+async def main():
     host = "localhost"
     port = 8765
 
     loop = asyncio.get_running_loop()
-    ww_detector = start_wake_word_detector(loop)
+    startup_mode = os.environ.get("DALI_STARTUP_MODE", config.get("startup_mode", "lazy"))
 
-    if not ww_detector:
-        logger.warning("⚠ Wake word detector failed; continuing without it")
+    if startup_mode == "eager":
+        await warm_up(loop)
 
-    logger.info(f"🚀 DALI WebSocket Server running on ws://{host}:{port}")
+    ws_config = config.get("websocket", {})
+    compression = "deflate" if ws_config.get("compression", True) else None
 
-    async with websockets.serve(handle_client, host, port):
-        await asyncio.Future()
+    async with websockets.serve(
+        handle_client, host, port,
+        subprotocols=SUBPROTOCOLS,
+        compression=compression,
+        ping_interval=ws_config.get("ping_interval", 20),
+        ping_timeout=ws_config.get("ping_timeout", 20),
+        # Incoming frames buffered per connection before reads stop (TCP backpressure)
+        max_queue=ws_config.get("max_queue", 16),
+    ):
+        await mark_ready("server")
+        logger.info(f"🚀 DALI WebSocket Server running on ws://{host}:{port}")
+        # The detector starts while connections are served; the task is cancelled if the server stops first
+        warmup_task = loop.create_task(warm_up(loop)) if startup_mode != "eager" else None
+        try:
+            await asyncio.Future()
+        finally:
+            if warmup_task and not warmup_task.done():
+                warmup_task.cancel()
 
 if __name__ == "__main__":
     try:
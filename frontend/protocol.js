@@ -0,0 +1,153 @@
+// Compact DALI wire protocol: MessagePack frames with short field codes.
+// Mirrors backend/protocol.py; JSON stays available as "dali.json.v1".
+const DALIProtocol = (() => {
+    const JSON_PROTOCOL = 'dali.json.v1';
+    const MSGPACK_PROTOCOL = 'dali.msgpack.v1';
+
+    const FIELD_CODES = {
+        type: 't', message: 'm', session_id: 's', language: 'l', speak: 'k',
+        timestamp: 'ts', id: 'i', event: 'e', enabled: 'en', voice_mode: 'v',
+        ready: 'r', config: 'c', components: 'cp', messages: 'ms', has_more: 'hm',
+        next_before_id: 'nb', before_id: 'b', limit: 'n', data: 'd', user: 'u',
+        bot: 'bo', sample_rate: 'sr', tts_rate: 'tr', seq: 'q', resume_token: 'rt',
+        resumed: 'rs', reply_id: 'ri', streamed: 'st', reason: 'rn', retry_after: 'ra',
+        final: 'f'
+    };
+    const FIELD_NAMES = Object.fromEntries(Object.entries(FIELD_CODES).map(([k, v]) => [v, k]));
+
+    const textEncoder = new TextEncoder();
+    const textDecoder = new TextDecoder();
+
+    function remap(value, table) {
+        if (Array.isArray(value)) return value.map((v) => remap(v, table));
+        if (value && typeof value === 'object' && !(value instanceof Uint8Array)) {
+            const out = {};
+            for (const [k, v] of Object.entries(value)) out[table[k] ?? k] = remap(v, table);
+            return out;
+        }
+        return value;
+    }
+
+    // --- MessagePack encoder (nil, bool, int, float64, str, bin, array, map) ---
+    function pack(value) {
+        const bytes = [];
+        const push8 = (b) => bytes.push(b & 0xff);
+        const push16 = (n) => { push8(n >> 8); push8(n); };
+        const push32 = (n) => { push8(n >>> 24); push8(n >>> 16); push8(n >>> 8); push8(n); };
+        const pushBytes = (arr) => { for (const b of arr) bytes.push(b); };
+
+        const write = (v) => {
+            if (v === null || v === undefined) {
+                push8(0xc0);
+            } else if (v === true || v === false) {
+                push8(v ? 0xc3 : 0xc2);
+            } else if (typeof v === 'number') {
+                if (Number.isInteger(v) && v >= 0 && v < 0x80) push8(v);
+                else if (Number.isInteger(v) && v < 0 && v >= -32) push8(v);
+                else if (Number.isInteger(v) && v >= 0 && v <= 0xffffffff) { push8(0xce); push32(v); }
+                else if (Number.isInteger(v) && v < 0 && v >= -0x80000000) { push8(0xd2); push32(v); }
+                else {
+                    const buf = new DataView(new ArrayBuffer(8));
+                    buf.setFloat64(0, v);
+                    push8(0xcb);
+                    pushBytes(new Uint8Array(buf.buffer));
+                }
+            } else if (typeof v === 'string') {
+                const utf8 = textEncoder.encode(v);
+                if (utf8.length < 32) push8(0xa0 | utf8.length);
+                else if (utf8.length < 0x100) { push8(0xd9); push8(utf8.length); }
+                else if (utf8.length < 0x10000) { push8(0xda); push16(utf8.length); }
+                else { push8(0xdb); push32(utf8.length); }
+                pushBytes(utf8);
+            } else if (v instanceof Uint8Array || v instanceof ArrayBuffer) {
+                const bin = v instanceof ArrayBuffer ? new Uint8Array(v) : v;
+                if (bin.length < 0x100) { push8(0xc4); push8(bin.length); }
+                else if (bin.length < 0x10000) { push8(0xc5); push16(bin.length); }
+                else { push8(0xc6); push32(bin.length); }
+                pushBytes(bin);
+            } else if (Array.isArray(v)) {
+                if (v.length < 16) push8(0x90 | v.length);
+                else if (v.length < 0x10000) { push8(0xdc); push16(v.length); }
+                else { push8(0xdd); push32(v.length); }
+                v.forEach(write);
+            } else {
+                const entries = Object.entries(v).filter(([, val]) => val !== undefined);
+                if (entries.length < 16) push8(0x80 | entries.length);
+                else if (entries.length < 0x10000) { push8(0xde); push16(entries.length); }
+                else { push8(0xdf); push32(entries.length); }
+                entries.forEach(([key, val]) => { write(key); write(val); });
+            }
+        };
+
+        write(value);
+        return new Uint8Array(bytes);
+    }
+
+    // --- MessagePack decoder ---
+    function unpack(buffer) {
+        const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        const str = (len) => { const s = textDecoder.decode(bytes.subarray(pos, pos + len)); pos += len; return s; };
+        const bin = (len) => { const b = bytes.slice(pos, pos + len); pos += len; return b; };
+        const arr = (len) => { const a = []; for (let i = 0; i < len; i++) a.push(read()); return a; };
+        const map = (len) => { const o = {}; for (let i = 0; i < len; i++) { const k = read(); o[k] = read(); } return o; };
+        const u8 = () => view.getUint8(pos++);
+        const u16 = () => { const v = view.getUint16(pos); pos += 2; return v; };
+        const u32 = () => { const v = view.getUint32(pos); pos += 4; return v; };
+
+        const read = () => {
+            const b = u8();
+            if (b < 0x80) return b;
+            if (b >= 0xe0) return b - 0x100;
+            if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+            if ((b & 0xf0) === 0x90) return arr(b & 0x0f);
+            if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+            switch (b) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: return bin(u8());
+                case 0xc5: return bin(u16());
+                case 0xc6: return bin(u32());
+                case 0xca: { const v = view.getFloat32(pos); pos += 4; return v; }
+                case 0xcb: { const v = view.getFloat64(pos); pos += 8; return v; }
+                case 0xcc: return u8();
+                case 0xcd: return u16();
+                case 0xce: return u32();
+                case 0xcf: { const v = Number(view.getBigUint64(pos)); pos += 8; return v; }
+                case 0xd0: { const v = view.getInt8(pos); pos += 1; return v; }
+                case 0xd1: { const v = view.getInt16(pos); pos += 2; return v; }
+                case 0xd2: { const v = view.getInt32(pos); pos += 4; return v; }
+                case 0xd3: { const v = Number(view.getBigInt64(pos)); pos += 8; return v; }
+                case 0xd9: return str(u8());
+                case 0xda: return str(u16());
+                case 0xdb: return str(u32());
+                case 0xdc: return arr(u16());
+                case 0xdd: return arr(u32());
+                case 0xde: return map(u16());
+                case 0xdf: return map(u32());
+                default: throw new Error(`Unsupported MessagePack byte 0x${b.toString(16)}`);
+            }
+        };
+
+        return read();
+    }
+
+    function encode(event, protocol) {
+        if (protocol === MSGPACK_PROTOCOL) return pack([remap(event, FIELD_CODES)]);
+        return JSON.stringify(event);
+    }
+
+    // Returns the list of events carried by one frame
+    function decode(data, protocol) {
+        if (protocol === MSGPACK_PROTOCOL && typeof data !== 'string') {
+            const events = remap(unpack(data), FIELD_NAMES);
+            return Array.isArray(events) ? events : [events];
+        }
+        return [JSON.parse(data)];
+    }
+
+    return { JSON_PROTOCOL, MSGPACK_PROTOCOL, SUBPROTOCOLS: [MSGPACK_PROTOCOL, JSON_PROTOCOL], encode, decode, pack, unpack };
+})();
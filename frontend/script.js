@@ -1,3 +1,116 @@
+class VirtualList {
+    // Renders only the rows near the viewport; off-screen rows are replaced by spacers
+    constructor(container, anchor, renderItem, { overscan = 8, estimatedHeight = 72 } = {}) {
+        this.container = container;
+        this.renderItem = renderItem;
+        this.overscan = overscan;
+        this.estimatedHeight = estimatedHeight;
+        this.items = [];
+        this.heights = [];
+        this.frame = null;
+
+        this.topSpacer = document.createElement('div');
+        this.content = document.createElement('div');
+        this.bottomSpacer = document.createElement('div');
+        container.insertBefore(this.topSpacer, anchor);
+        container.insertBefore(this.content, anchor);
+        container.insertBefore(this.bottomSpacer, anchor);
+
+        container.addEventListener('scroll', () => this.scheduleRender());
+        window.addEventListener('resize', () => this.scheduleRender());
+    }
+
+    heightOf(index) {
+        return this.heights[index] ?? this.estimatedHeight;
+    }
+
+    isNearBottom() {
+        const c = this.container;
+        return c.scrollHeight - c.scrollTop - c.clientHeight < 80;
+    }
+
+    append(item) {
+        const stick = this.isNearBottom();
+        this.items.push(item);
+        this.heights.push(undefined);
+        this.render();
+        if (stick) this.scrollToBottom();
+    }
+
+    update() {
+        // Re-render after an item's content changed in place
+        const stick = this.isNearBottom();
+        this.render();
+        if (stick) this.scrollToBottom();
+    }
+
+    prepend(items) {
+        if (!items.length) return;
+        const c = this.container;
+        const previousHeight = c.scrollHeight;
+        const previousTop = c.scrollTop;
+        this.items.unshift(...items);
+        this.heights.unshift(...new Array(items.length));
+        this.render();
+        // Keep the rows the user was looking at in place
+        c.scrollTop = previousTop + (c.scrollHeight - previousHeight);
+    }
+
+    scrollToBottom() {
+        this.container.scrollTop = this.container.scrollHeight;
+        this.render();
+    }
+
+    scheduleRender() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    render() {
+        const c = this.container;
+        const viewTop = c.scrollTop - this.topSpacer.offsetTop;
+        const viewBottom = viewTop + c.clientHeight;
+
+        let start = 0;
+        let offset = 0;
+        while (start < this.items.length && offset + this.heightOf(start) < viewTop) {
+            offset += this.heightOf(start);
+            start++;
+        }
+        let end = start;
+        let bottom = offset;
+        while (end < this.items.length && bottom < viewBottom) {
+            bottom += this.heightOf(end);
+            end++;
+        }
+        start = Math.max(0, start - this.overscan);
+        end = Math.min(this.items.length, end + this.overscan);
+
+        let top = 0;
+        for (let i = 0; i < start; i++) top += this.heightOf(i);
+        let rest = 0;
+        for (let i = end; i < this.items.length; i++) rest += this.heightOf(i);
+
+        const rows = this.items.slice(start, end).map((item) => {
+            const row = document.createElement('div');
+            row.className = 'virtual-row';
+            row.appendChild(this.renderItem(item));
+            return row;
+        });
+        this.content.replaceChildren(...rows);
+        rows.forEach((row, k) => { this.heights[start + k] = row.offsetHeight; });
+
+        this.topSpacer.style.height = `${top}px`;
+        this.bottomSpacer.style.height = `${rest}px`;
+    }
+}
+
+// websocket_server.SESSION_TAKEOVER_CODE
+const SESSION_TAKEOVER_CODE = 4001;
+
 class DALIClient {
     constructor() {
         this.ws = null;
@@ -7,6 +120,20 @@ class DALIClient {
         this.ttsEnabled = true;
         this.recognition = null;
         this.isListening = false;
+        this.sessionId = null;
+        // Per tab: a token shared across tabs would make them take the session from each other
+        this.resumeToken = sessionStorage.getItem('dali_resume_token');
+        // Per browser and persistent: the server shows history of every session opened with it
+        this.clientKey = this.loadClientKey();
+        this.lastSeq = null;
+        this.reconnectAttempts = 0;
+        this.offerSubprotocols = true;
+        this.streamingReplies = {};
+        this.historySessionId = null;
+        this.historyBeforeId = null;
+        this.historyHasMore = false;
+        this.historyLoading = false;
+        this.historyFirstPage = true;
 
         this.initElements();
         this.initVoiceRecognition();
@@ -25,9 +152,13 @@ class DALIClient {
         this.typingIndicator = document.getElementById('typingIndicator');
         this.languageInfo = document.getElementById('languageInfo');
         this.voiceToggleBtn = document.getElementById('voiceToggleBtn'); // optional manual toggle
+        this.messageList = new VirtualList(this.chatContainer, this.typingIndicator, (item) => this.renderMessage(item));
     }
 
     initEventListeners() {
+        this.chatContainer.addEventListener('scroll', () => {
+            if (this.chatContainer.scrollTop < 200) this.requestHistory();
+        });
         this.sendBtn.addEventListener('click', () => this.sendMessage());
         this.micBtn.addEventListener('click', () => this.toggleListening());
         this.speakerBtn.addEventListener('click', () => this.toggleTTS());
@@ -52,16 +183,37 @@ class DALIClient {
         }
     }
 
+    loadClientKey() {
+        let key = localStorage.getItem('dali_client_key');
+        if (!key) {
+            const bytes = crypto.getRandomValues(new Uint8Array(16));
+            key = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+            localStorage.setItem('dali_client_key', key);
+        }
+        return key;
+    }
+
     connect() {
-        this.ws = new WebSocket(this.wsUrl);
+        // Resume the previous session if we have a token; only missed events are replayed
+        const params = new URLSearchParams({ client_key: this.clientKey });
+        if (this.resumeToken) {
+            params.set('resume', this.resumeToken);
+            if (this.lastSeq !== null) params.set('last_seq', this.lastSeq);
+        }
+        const url = `${this.wsUrl}?${params}`;
+        // Offer the compact protocol first; servers that select none speak JSON, and
+        // servers that reject the offer are retried without it (see onDisconnect)
+        this.ws = this.offerSubprotocols ? new WebSocket(url, DALIProtocol.SUBPROTOCOLS) : new WebSocket(url);
+        this.ws.binaryType = 'arraybuffer';
         this.ws.onopen = () => this.onConnect();
         this.ws.onmessage = (event) => this.onMessage(event);
         this.ws.onerror = (error) => this.onError(error);
-        this.ws.onclose = () => this.onDisconnect();
+        this.ws.onclose = (event) => this.onDisconnect(event);
     }
 
     onConnect() {
         this.isConnected = true;
+        this.reconnectAttempts = 0;
         this.updateStatus(true, 'Connected');
         this.messageInput.disabled = false;
         this.sendBtn.disabled = false;
@@ -70,8 +222,18 @@ class DALIClient {
         this.addSystemMessage('✅ Connected to DALI Assistant');
     }
 
+    send(event) {
+        this.ws.send(DALIProtocol.encode(event, this.ws.protocol));
+    }
+
     onMessage(event) {
-        const msg = JSON.parse(event.data);
+        DALIProtocol.decode(event.data, this.ws.protocol).forEach((msg) => this.handleEvent(msg));
+    }
+
+    handleEvent(msg) {
+        if (typeof msg.seq === 'number') {
+            this.lastSeq = Math.max(this.lastSeq ?? 0, msg.seq);
+        }
         if (msg.event === 'voice_mode') {
             this.voiceMode = msg.enabled;
             if (this.voiceMode) {
@@ -82,20 +244,45 @@ class DALIClient {
                 this.hideListeningAnimation();
             }
         }
-        if (msg.text) {
+        if (msg.type === 'response_part') {
+            this.onResponsePart(msg);
+        }
+        if (msg.type === 'response') {
             this.hideTypingIndicator();
-            this.addBotMessage(msg.text);
-            if (msg.speak && this.ttsEnabled) {
-                this.speak(msg.text);
+            const streamed = msg.streamed && this.streamingReplies[msg.reply_id];
+            if (streamed) {
+                // Sentences were already shown and spoken; settle on the final text
+                streamed.text = msg.message;
+                this.messageList.update();
+                delete this.streamingReplies[msg.reply_id];
+            } else {
+                this.addBotMessage(msg.message);
+                if (msg.speak && this.ttsEnabled) {
+                    this.speak(msg.message, msg.language);
+                }
             }
             if (msg.language) {
                 this.updateLanguage(msg.language);
             }
         }
+        if (msg.type === 'history') {
+            this.onHistory(msg);
+        }
         if (msg.type === 'system') {
             this.addSystemMessage(msg.message);
+            if (msg.session_id) {
+                this.onSession(msg);
+            }
+        }
+        if (msg.type === 'busy') {
+            this.hideTypingIndicator();
+            this.addSystemMessage(`⏳ ${msg.message} (retry in ${Math.ceil(msg.retry_after || 1)}s)`);
         }
         if (msg.type === 'error') {
+            if (msg.request === 'history') {
+                this.historyLoading = false;
+                this.historyHasMore = false;
+            }
             this.addSystemMessage(`❌ ${msg.message}`);
         }
     }
@@ -179,7 +366,7 @@ class DALIClient {
         this.speakerBtn.classList.toggle('muted', !this.ttsEnabled);
         this.addSystemMessage(this.ttsEnabled ? '🔊 Voice output enabled' : '🔇 Voice output disabled');
         if (this.isConnected) {
-            this.ws.send(JSON.stringify({ type: 'toggle_tts', enabled: this.ttsEnabled }));
+            this.send({ type: 'toggle_tts', enabled: this.ttsEnabled });
         }
     }
 
@@ -189,31 +376,102 @@ class DALIClient {
         this.addUserMessage(message);
         this.messageInput.value = '';
         this.showTypingIndicator();
-        this.ws.send(JSON.stringify({ type: 'text', message }));
+        this.send({ type: 'text', message });
     }
 
-    addUserMessage(text) {
+    onResponsePart(msg) {
+        this.hideTypingIndicator();
+        let item = this.streamingReplies[msg.reply_id];
+        if (!item) {
+            item = this.addBotMessage(msg.message);
+            this.streamingReplies[msg.reply_id] = item;
+        } else {
+            item.text += ` ${msg.message}`;
+            this.messageList.update();
+        }
+        if (msg.speak && this.ttsEnabled) {
+            this.speak(msg.message, msg.language);
+        }
+    }
+
+    speak(text, language) {
+        // speechSynthesis queues utterances, so sentences play back to back
+        if (!window.speechSynthesis) return;
+        const utterance = new SpeechSynthesisUtterance(text);
+        utterance.lang = language === 'hindi' ? 'hi-IN' : 'en-US';
+        window.speechSynthesis.speak(utterance);
+    }
+
+    onSession(msg) {
+        const firstLoad = this.sessionId === null;
+        this.sessionId = msg.session_id;
+        this.resumeToken = msg.resume_token || null;
+        if (this.resumeToken) sessionStorage.setItem('dali_resume_token', this.resumeToken);
+        if (!msg.resumed) this.lastSeq = msg.seq ?? null;
+
+        // Reconnects within a page load get missed events replayed; a fresh page
+        // (reload or new tab) loads this browser's history from the server
+        if (firstLoad) {
+            this.historySessionId = msg.session_id;
+            this.historyBeforeId = null;
+            this.historyHasMore = true;
+            this.requestHistory();
+        }
+    }
+
+    requestHistory() {
+        if (!this.isConnected || this.historyLoading || !this.historyHasMore || !this.historySessionId) return;
+        this.historyLoading = true;
+        this.send({
+            type: 'history',
+            session_id: this.historySessionId,
+            before_id: this.historyBeforeId,
+            limit: 50
+        });
+    }
+
+    onHistory(msg) {
+        this.historyLoading = false;
+        this.historyHasMore = msg.has_more;
+        this.historyBeforeId = msg.next_before_id;
+        const items = [];
+        msg.messages.forEach((m) => {
+            const time = this.formatTime(m.timestamp);
+            items.push({ kind: 'user', text: m.user, time });
+            items.push({ kind: 'bot', text: m.bot, time });
+        });
+        this.messageList.prepend(items);
+        if (this.historyFirstPage) {
+            this.historyFirstPage = false;
+            this.messageList.scrollToBottom();
+        }
+    }
+
+    renderMessage(item) {
         const div = document.createElement('div');
-        div.className = 'message user';
-        div.innerHTML = `<div><div class="message-content">${this.escapeHtml(text)}</div><div class="message-time">${this.getCurrentTime()}</div></div>`;
-        this.chatContainer.appendChild(div);
-        this.scrollToBottom();
+        if (item.kind === 'system') {
+            div.className = 'system-message';
+            div.textContent = item.text;
+        } else {
+            div.className = `message ${item.kind}${item.fresh ? ' fresh' : ''}`;
+            item.fresh = false;
+            div.innerHTML = `<div><div class="message-content">${this.escapeHtml(item.text)}</div><div class="message-time">${item.time}</div></div>`;
+        }
+        return div;
+    }
+
+    addUserMessage(text) {
+        this.messageList.append({ kind: 'user', text, time: this.getCurrentTime(), fresh: true });
     }
 
     addBotMessage(text) {
-        const div = document.createElement('div');
-        div.className = 'message bot';
-        div.innerHTML = `<div><div class="message-content">${this.escapeHtml(text)}</div><div class="message-time">${this.getCurrentTime()}</div></div>`;
-        this.chatContainer.appendChild(div);
-        this.scrollToBottom();
+        const item = { kind: 'bot', text, time: this.getCurrentTime(), fresh: true };
+        this.messageList.append(item);
+        return item;
     }
 
     addSystemMessage(text) {
-        const div = document.createElement('div');
-        div.className = 'system-message';
-        div.textContent = text;
-        this.chatContainer.appendChild(div);
-        this.scrollToBottom();
+        this.messageList.append({ kind: 'system', text });
     }
 
     showTypingIndicator() {
@@ -235,13 +493,19 @@ class DALIClient {
     }
 
     scrollToBottom() {
-        this.chatContainer.scrollTop = this.chatContainer.scrollHeight;
+        this.messageList.scrollToBottom();
     }
 
     getCurrentTime() {
         return new Date().toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
     }
 
+    formatTime(timestamp) {
+        // SQLite CURRENT_TIMESTAMP is UTC "YYYY-MM-DD HH:MM:SS"
+        const date = new Date(`${String(timestamp).replace(' ', 'T')}Z`);
+        return isNaN(date) ? '' : date.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
+    }
+
     escapeHtml(text) {
         const div = document.createElement('div');
         div.textContent = text;
@@ -252,7 +516,8 @@ class DALIClient {
         console.error('WebSocket error:', error);
     }
 
-    onDisconnect() {
+    onDisconnect(event) {
+        const wasOpen = this.isConnected;
         this.isConnected = false;
         this.updateStatus(false, 'Disconnected');
         this.messageInput.disabled = true;
@@ -260,6 +525,30 @@ class DALIClient {
         this.micBtn.disabled = true;
         this.speakerBtn.disabled = true;
         this.stopListening();
+        if (event && event.code === SESSION_TAKEOVER_CODE) {
+            // Another connection resumed this session; reconnecting would just take it back
+            this.updateStatus(false, 'Session opened elsewhere');
+            return;
+        }
+        if (!wasOpen && this.offerSubprotocols) {
+            // Failed during the handshake: either the server is down or it is an older
+            // one that rejects subprotocols. Retry once right away with plain JSON.
+            this.offerSubprotocols = false;
+            this.connect();
+            return;
+        }
+        // Still unreachable without subprotocols: the server is down, so offer them again next time
+        if (!wasOpen) this.offerSubprotocols = true;
+        this.scheduleReconnect();
+    }
+
+    scheduleReconnect() {
+        // Exponential backoff with jitter, capped at 30 s
+        const base = Math.min(30000, 500 * 2 ** this.reconnectAttempts);
+        const delay = Math.round(base * (0.5 + Math.random() / 2));
+        this.reconnectAttempts++;
+        this.updateStatus(false, `Reconnecting in ${Math.ceil(delay / 1000)}s...`);
+        setTimeout(() => this.connect(), delay);
     }
 }
 
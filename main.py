@@ -6,17 +6,23 @@ import uuid
 import pyaudio
 import queue
 import time
+from collections import deque
 from datetime import datetime
-from vosk import Model, KaldiRecognizer
+from vosk import KaldiRecognizer
 import json as js
 import re
 
 from backend.speech_handler import speak_async, cleanup_audio
-from backend.language_handler import load_models, detect_language, switch_language
+from backend.language_handler import ModelWarmup, detect_language, switch_language
 from backend.database_handler import ConversationDB
-from backend.rasa_handler import get_rasa_reply
+from backend.rasa_handler import stream_rasa_sentences
+
+# Audio captured while the first model is still loading (4000-frame chunks, ~10 s)
+STARTUP_BUFFER_CHUNKS = 40
 
 def main():
+    startup_t0 = time.perf_counter()
+
     # Load configuration
     with open("backend/config.json", "r") as f:
         config = json.load(f)
@@ -28,25 +34,86 @@ def main():
     db.start_session(session_id)
     print(f"🆔 Session started: {session_id}")
 
-    # Load Vosk models
-    models = load_models(config['model_paths'])
     current_lang = "english"
-    recognizer = KaldiRecognizer(models[current_lang], config['sample_rate'])
-
+    asr_config = config.get("asr_service", {})
+    if asr_config.get("enabled"):
+        # The shared ASR service holds the models; this process only streams audio
+        from backend.asr_client import RemoteRecognizer, DEFAULT_URL
+        warmup = None
+        models = dict.fromkeys(config['model_paths'])
+
+        def new_recognizer(lang):
+            return RemoteRecognizer(asr_config.get("url", DEFAULT_URL), lang,
+                                    config['sample_rate'], session_id=session_id)
+    else:
+        # Load Vosk models in the background; "eager" waits for all of them first
+        warmup = ModelWarmup(config['model_paths'], first=current_lang).start()
+        if os.environ.get("DALI_STARTUP_MODE", config.get("startup_mode", "lazy")) == "eager":
+            warmup.done.wait()
+        models = warmup.models
+
+        def new_recognizer(lang):
+            return KaldiRecognizer(models[lang], config['sample_rate'])
+
+    from backend.audio_capture import AdaptiveCapture
     mic = pyaudio.PyAudio()
-    stream = mic.open(
-        rate=16000,
-        channels=1,
-        format=pyaudio.paInt16,
-        input=True,
-        frames_per_buffer=8000
-    )
-    stream.start_stream()
+    # Counts overruns and decode lag, and resizes buffers/chunks when capture falls behind
+    capture = AdaptiveCapture.from_config(mic, config, name="main mic").open()
+    print(f"⏱️ Mic open after {time.perf_counter() - startup_t0:.2f}s")
+
+    # Keep recording while the wake-word model loads so early speech is not lost
+    pending_audio = deque(maxlen=STARTUP_BUFFER_CHUNKS)
+    while warmup and not warmup.first_ready.is_set():
+        pending_audio.append(capture.read())
+
+    if current_lang not in models:
+        print(f"❌ No {current_lang} Vosk model available, check model_paths in config.json")
+        cleanup_audio(capture.stream, mic)
+        db.end_session(session_id)
+        return
+
+    try:
+        recognizer = new_recognizer(current_lang)
+    except Exception as e:
+        print(f"❌ Speech recognizer unavailable: {e}")
+        cleanup_audio(capture.stream, mic)
+        db.end_session(session_id)
+        return
+    print(f"⏱️ Wake word ready after {time.perf_counter() - startup_t0:.2f}s")
+
+    # Optional grammar pass for commands with its own small models; the open-vocabulary
+    # fallback needs local models (imported only when enabled)
+    constrained = None
+    if warmup and config.get("constrained_recognition", {}).get("enabled"):
+        from backend.command_grammar import ConstrainedDecoding
+        constrained = ConstrainedDecoding.from_config(config)
+
+    def read_chunk():
+        """Drain audio buffered during startup before reading the mic"""
+        if pending_audio:
+            return pending_audio.popleft()
+        while True:
+            data = capture.read()
+            # While decoding lags, silent chunks are dropped here instead of decoded
+            if capture.should_decode(data):
+                return data
+
+    def accept(recog, data):
+        """AcceptWaveform, timed for the capture's real-time factor"""
+        t0 = time.perf_counter()
+        final = recog.AcceptWaveform(data)
+        capture.record_decode(data, time.perf_counter() - t0)
+        return final
 
     print("🎤 DALI is ready. Say 'Hey Dali' or 'Hello Dali' to wake me up.")
     speak_async("Voice assistant Dali initialized and listening.", current_lang, config['tts_rate'])
 
     conversation_count = 0
+    speculator = None
+    if config.get("speculative_nlu", {}).get("enabled"):
+        from backend.speculation import SpeculativeParser
+        speculator = SpeculativeParser.from_config(config)
+    first_wake_logged = False
 
     # --- Helper functions ---
     def detect_wake_word(text):
@@ -57,17 +124,25 @@ def main():
         """Listens for a command after wake word"""
         print("🎧 Listening for your command...")
         speak_async("I'm listening.", current_lang, config['tts_rate'])
-        recog = KaldiRecognizer(models[current_lang], 16000)
+        if constrained and constrained.covers(current_lang):
+            recog = constrained.recognizer(current_lang, lambda: new_recognizer(current_lang),
+                                           config['sample_rate'])
+        else:
+            recog = new_recognizer(current_lang)
         text = ""
         start_time = time.time()
+        if speculator:
+            speculator.reset()
 
         while True:
-            data = stream.read(4000, exception_on_overflow=False)
-            if recog.AcceptWaveform(data):
+            data = read_chunk()
+            if accept(recog, data):
                 result = js.loads(recog.Result())
                 text = result.get("text", "")
                 if text:
                     break
+            elif speculator:
+                speculator.feed_partial(js.loads(recog.PartialResult()).get("partial", ""))
             if time.time() - start_time > 8:  # timeout
                 break
         return text.strip()
@@ -76,24 +151,29 @@ def main():
     try:
         partial_text = ""
         while True:
-            data = stream.read(4000, exception_on_overflow=False)
-            if recognizer.AcceptWaveform(data):
+            data = read_chunk()
+            if accept(recognizer, data):
                 result = json.loads(recognizer.Result())
                 text = result.get("text", "")
                 if detect_wake_word(text):
                     print("🎯 Wake word detected!")
+                    if not first_wake_logged:
+                        first_wake_logged = True
+                        print(f"⏱️ First wake after {time.perf_counter() - startup_t0:.2f}s")
                     command = listen_for_command()
                     if command:
+                        command_t0 = time.perf_counter()
                         print(f"🧑 You said: {command}")
                         conversation_count += 1
 
                         detected_lang = detect_language(command, current_lang)
-                        if detected_lang != current_lang:
+                        if detected_lang != current_lang and detected_lang in models:
                             old_lang = current_lang
                             current_lang, recognizer = switch_language(
                                 detected_lang, models, current_lang,
-                                recognizer, config['sample_rate'], stream,
-                                lambda txt, lang: speak_async(txt, lang, config['tts_rate'])
+                                recognizer, config['sample_rate'], None,
+                                lambda txt, lang: speak_async(txt, lang, config['tts_rate']),
+                                new_recognizer=new_recognizer
                             )
                             db.log_language_switch(session_id, old_lang, current_lang)
 
@@ -101,32 +181,72 @@ def main():
                             speak_async("Goodbye!", current_lang, config['tts_rate'])
                             break
 
-                        reply = get_rasa_reply(command, config['rasa_url'])
-                        print(f"🤖 DALI: {reply}")
-                        speak_async(reply, current_lang, config['tts_rate'])
+                        # Speak each sentence as soon as it arrives instead of the joined reply
+                        sentences = []
+                        # A speculative hit sends "/intent{...}" so Rasa skips NLU
+                        message = speculator.resolve(command) if speculator else command
+                        for _, sentence in stream_rasa_sentences(message, config['rasa_url'], sender=session_id):
+                            if not sentences:
+                                print(f"⏱️ First sentence after {time.perf_counter() - command_t0:.2f}s")
+                            print(f"🤖 DALI: {sentence}")
+                            speak_async(sentence, current_lang, config['tts_rate'])
+                            sentences.append(sentence)
+                        reply = " ".join(sentences)
                         db.add_conversation(
                             session_id=session_id,
                             language=current_lang,
-                            user_text=command,
-                            bot_reply=reply,
+                            user_input=command,
+                            bot_response=reply,
                         )
                     else:
                         speak_async("I didn’t catch that.", current_lang, config['tts_rate'])
+                    # The mic was not read while the command was handled
+                    capture.resync()
 
     except KeyboardInterrupt:
         print("\n🛑 Stopping DALI...")
 
     finally:
-        cleanup_audio(stream, mic)
+        cleanup_audio(capture.stream, mic)
+        db.log_audio_stats(session_id, capture.name, capture.stats.snapshot())
         db.end_session(session_id)
         stats = db.get_statistics()
         print("\n📊 SESSION SUMMARY")
         print("=" * 60)
         print(f"Total conversations: {conversation_count}")
         print(f"Languages used: {', '.join(stats['conversations_by_language'].keys())}")
+        print(f"Audio capture: {capture.stats.summary()}")
+        if speculator:
+            print(f"Speculative NLU: {speculator.summary()}")
+        if constrained:
+            print(f"Constrained recognition: {constrained.summary()}")
         print("=" * 60)
         print("✓ DALI session ended successfully.")
 
 
+def run_multi_device(device_indices):
+    """Serve several microphones from one process sharing the loaded Vosk models"""
+    from backend.voice_host import VoiceHost
+
+    with open("backend/config.json", "r") as f:
+        config = json.load(f)
+    VoiceHost(config, device_indices).run()
+
+
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DALI offline voice assistant")
+    parser.add_argument("--devices", type=int, nargs="+",
+                        help="Audio input device indices to serve at once (multi-stream mode)")
+    parser.add_argument("--list-devices", action="store_true", help="List audio input devices and exit")
+    args = parser.parse_args()
+
+    if args.list_devices:
+        from backend.voice_host import list_input_devices
+        for index, name in list_input_devices():
+            print(f"{index}: {name}")
+    elif args.devices:
+        run_multi_device(args.devices)
+    else:
+        main()
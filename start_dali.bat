@@ -27,9 +27,22 @@ cd backend\rasa
 set modelFound=
 for /f "delims=" %%i in ('dir /b /a-d models\*.tar.gz 2^>nul') do set modelFound=1
 
+REM Pipeline profile: config.yml (default) or config_latency.yml (CPU latency-tuned)
+if not defined DALI_RASA_CONFIG set DALI_RASA_CONFIG=config.yml
+
+REM models\.profile records the profile of the last training; retrain when it changed
+set lastProfile=config.yml
+if exist models\.profile set /p lastProfile=<models\.profile
+if defined modelFound if /i not "%lastProfile%"=="%DALI_RASA_CONFIG%" (
+    echo ⚠️ Existing model was trained with %lastProfile%, not %DALI_RASA_CONFIG%
+    set modelFound=
+)
+
 if not defined modelFound (
-    echo 🧠 Training Rasa model...
-    rasa train
+    echo 🧠 Training Rasa model with %DALI_RASA_CONFIG%...
+    python benchmark.py prune-cache
+    rasa train --config %DALI_RASA_CONFIG%
+    if not errorlevel 1 (echo %DALI_RASA_CONFIG%)>models\.profile
 )
 
 echo ✅ Rasa model ready
@@ -48,6 +61,13 @@ timeout /t 5 >nul
 REM 5️⃣ Navigate back to root
 cd ..\..
 
+REM Shared ASR service (set DALI_ASR_SERVICE=1 and "asr_service.enabled" in config.json)
+if "%DALI_ASR_SERVICE%"=="1" (
+    echo 🗣️ Starting ASR Service (port 2700)
+    start "ASR Service" cmd /k "cd /d %~dp0 && call env\Scripts\activate && python backend\asr_service.py"
+    timeout /t 3 >nul
+)
+
 REM 6️⃣ Start Voice Assistant (Optional - comment out if not needed)
 echo 🎙️ Starting DALI Voice Assistant
 start "DALI Voice" cmd /k "cd /d %~dp0 && call env\Scripts\activate && python main.py"
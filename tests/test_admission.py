@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, Busy, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_reports_wait(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    for _ in range(3):
+        bucket.try_acquire()
+    clock.now += 0.25
+    assert bucket.try_acquire() == pytest.approx(0.25)
+    clock.now += 0.25
+    assert bucket.try_acquire() == 0.0
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=1.0, burst=2)
+    bucket.try_acquire()
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+
+
+def test_check_rate_raises_busy(clock):
+    controller = AdmissionController(rate=1.0, burst=1)
+    bucket = controller.new_bucket()
+    controller.check_rate(bucket)
+    with pytest.raises(Busy) as excinfo:
+        controller.check_rate(bucket)
+    assert excinfo.value.reason == "rate_limited"
+    assert excinfo.value.retry_after == 1.0
+    assert controller.metrics["rejected_rate_limited"] == 1
+
+
+def test_slot_semaphore_is_created_in_the_running_loop():
+    # Built outside any loop, as websocket_server does at import time
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+    assert controller._slots is None
+
+    async def main():
+        release = asyncio.Event()
+
+        async def turn():
+            async with controller.slot():
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(turn()) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert controller.metrics["admitted"] == 2
+    assert controller.metrics["queued"] == 1
+    assert controller.snapshot()["in_flight"] == 0
+
+
+def test_slot_rejects_when_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Busy) as excinfo:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return excinfo.value
+
+    busy = asyncio.run(main())
+    assert busy.reason == "queue_full"
+    assert controller.metrics["rejected_queue_full"] == 1
+    assert controller.snapshot()["in_flight"] == 0
+
+
+def test_slot_sheds_after_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(Busy) as excinfo:
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+        return excinfo.value
+
+    busy = asyncio.run(main())
+    assert busy.reason == "queue_timeout"
+    assert controller.metrics["rejected_queue_timeout"] == 1
+    assert controller.snapshot()["waiting"] == 0
@@ -0,0 +1,112 @@
+import importlib
+import os
+
+import pytest
+
+from database_handler import ConversationDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    return ConversationDB(str(tmp_path / "conversations.db"))
+
+
+def _add(db, session_id, count, prefix):
+    return [db.add_conversation(session_id, f"{prefix}{i}", "reply") for i in range(count)]
+
+
+def test_session_pages_walk_back_without_gaps(db):
+    db.start_session("s1")
+    ids = _add(db, "s1", 5, "u")
+
+    rows, has_more = db.get_session_history_page("s1", None, 2)
+    assert [r["id"] for r in rows] == ids[3:]
+    assert has_more
+
+    rows, has_more = db.get_session_history_page("s1", rows[0]["id"], 2)
+    assert [r["id"] for r in rows] == ids[1:3]
+    assert has_more
+
+    rows, has_more = db.get_session_history_page("s1", rows[0]["id"], 2)
+    assert [r["id"] for r in rows] == ids[:1]
+    assert not has_more
+
+
+def test_exact_page_boundary_has_no_more(db):
+    db.start_session("s1")
+    ids = _add(db, "s1", 4, "u")
+    rows, has_more = db.get_session_history_page("s1", None, 4)
+    assert [r["id"] for r in rows] == ids
+    assert not has_more
+    assert db.get_session_history_page("s1", ids[0], 4) == ([], False)
+
+
+def test_session_pages_exclude_other_sessions(db):
+    db.start_session("s1")
+    db.start_session("s2")
+    _add(db, "s1", 2, "a")
+    _add(db, "s2", 2, "b")
+    rows, has_more = db.get_session_history_page("s1", None, 10)
+    assert [r["user_input"] for r in rows] == ["a0", "a1"]
+    assert not has_more
+
+
+def test_client_pages_span_sessions_of_that_key(db):
+    key, other = "k" * 16, "z" * 16
+    db.start_session("s1", key)
+    db.start_session("s2", other)
+    db.start_session("s3", key)
+    _add(db, "s1", 2, "a")
+    _add(db, "s2", 2, "x")
+    _add(db, "s3", 2, "b")
+
+    rows, has_more = db.get_client_history_page(key, None, 3)
+    assert [r["user_input"] for r in rows] == ["a1", "b0", "b1"]
+    assert has_more
+    rows, has_more = db.get_client_history_page(key, rows[0]["id"], 3)
+    assert [r["user_input"] for r in rows] == ["a0"]
+    assert not has_more
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    # Importing the server opens conversations.db relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("server"))
+    try:
+        return importlib.import_module("websocket_server")
+    finally:
+        os.chdir(cwd)
+
+
+def test_history_request_defaults_and_clamps(server):
+    assert server.parse_history_request({}, "s1") == (None, server.HISTORY_PAGE_SIZE)
+    assert server.parse_history_request({"session_id": "s1", "before_id": 7, "limit": 10}, "s1") == (7, 10)
+    assert server.parse_history_request({"limit": 10 ** 6}, "s1") == (None, server.HISTORY_MAX_PAGE_SIZE)
+
+
+@pytest.mark.parametrize("data", [
+    {"session_id": "someone_else"},
+    {"before_id": "12"},
+    {"before_id": 0},
+    {"before_id": True},
+    {"before_id": 1.5},
+    {"limit": "50"},
+    {"limit": 0},
+    {"limit": None},
+])
+def test_invalid_history_requests_raise_value_error(server, data):
+    with pytest.raises(ValueError):
+        server.parse_history_request(data, "s1")
+
+
+@pytest.mark.parametrize("path, key", [
+    ("/ws?client_key=0123456789abcdef", "0123456789abcdef"),
+    ("/ws?resume=t&client_key=abc-DEF_0123456789", "abc-DEF_0123456789"),
+    ("/ws?client_key=short", None),
+    ("/ws?client_key=" + "a" * 65, None),
+    ("/ws?client_key=0123456789abcdef%27--", None),
+    ("/ws", None),
+])
+def test_client_key_from_url(server, path, key):
+    assert server.parse_client_key(path) == key
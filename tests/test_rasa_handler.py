@@ -0,0 +1,40 @@
+import pytest
+
+from rasa_handler import split_sentences
+
+
+def test_splits_on_terminal_punctuation():
+    assert split_sentences("Hello there. How are you? Fine!") == ["Hello there.", "How are you?", "Fine!"]
+
+
+def test_splits_on_devanagari_danda():
+    assert split_sentences("नमस्ते। आप कैसे हैं? ठीक है।") == ["नमस्ते।", "आप कैसे हैं?", "ठीक है।"]
+
+
+def test_danda_without_following_space_is_one_sentence():
+    assert split_sentences("नमस्ते।") == ["नमस्ते।"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ask Dr. Rao. He knows.", ["Ask Dr. Rao.", "He knows."]),
+    ("Mr. and Mrs. Shah are here.", ["Mr. and Mrs. Shah are here."]),
+    ("Open an app, e.g. Chrome. Done.", ["Open an app, e.g. Chrome.", "Done."]),
+    ("Use one, i.e. the first. Done.", ["Use one, i.e. the first.", "Done."]),
+    ("India vs. Australia starts now. Enjoy!", ["India vs. Australia starts now.", "Enjoy!"]),
+    ("Written by J. R. R. Tolkien. Nice.", ["Written by J. R. R. Tolkien.", "Nice."]),
+])
+def test_does_not_split_after_abbreviations(text, expected):
+    assert split_sentences(text) == expected
+
+
+def test_decimal_numbers_are_not_sentence_ends():
+    assert split_sentences("Version 3.5 is out. Update now.") == ["Version 3.5 is out.", "Update now."]
+
+
+@pytest.mark.parametrize("text", ["", None, "   "])
+def test_empty_input(text):
+    assert split_sentences(text) == []
+
+
+def test_collapses_surrounding_whitespace():
+    assert split_sentences("  One.\n\nTwo.  ") == ["One.", "Two."]